@@ -1,28 +1,70 @@
 import os
 import sys
+import time
+import functools
+import threading
+import queue
+import json
+import random
+import signal
 import argparse
 import sqlite3
 import logging
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import csv
-from dateutil import parser as dateparser
+import gzip
+import hashlib
+import math
+import struct
+import re
+import importlib
+import itertools
+import statistics
+import subprocess
+import tempfile
+from urllib.parse import urlsplit, urlunsplit, urljoin, parse_qsl, urlencode
+from email.utils import parsedate_to_datetime
+from html import unescape
 
-# Optional pandas for Excel
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except Exception:
-    PANDAS_AVAILABLE = False
+# Heavy dependencies (requests, bs4, dateutil, asyncio, openpyxl, pyarrow) are
+# imported inside the functions that need them, so commands such as view and
+# list-sources do not pay their import time. `bench startup` guards this.
 
 # Logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-DB_PATH = "news.db"
+DB_PATH = os.getenv("NEWS_DB", "news.db")
+
+def sidecar_path(suffix):
+    """Path of a file stored next to the database, e.g. news.httpcache.json."""
+    return os.path.splitext(DB_PATH)[0] + suffix
+
+# Storage profiles: PRAGMAs applied to every connection by init_db.
+# "compat" is SQLite's stock rollback journal with a full fsync per commit.
+# "wal" lets view/export read while fetch writes and syncs only at checkpoints.
+# "fast" adds a larger page cache and memory-mapped reads.
+STORAGE_PROFILES = {
+    "compat": {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000},
+    "wal": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+    "fast": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000,
+             "cache_size": -65536, "mmap_size": 268435456, "temp_store": "MEMORY"},
+}
+STORAGE_PROFILE = os.getenv("NEWS_DB_PROFILE", "wal")
+
+def apply_profile(conn, profile=None):
+    """Apply a storage profile's PRAGMAs (journal mode persists in the file)."""
+    name = profile or STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile: {name}")
+    for pragma, value in STORAGE_PROFILES[name].items():
+        row = conn.execute(f"PRAGMA {pragma} = {value}").fetchone()
+        if pragma == "journal_mode" and row and row[0].upper() != value:
+            # e.g. in-memory databases cannot use WAL
+            logging.debug("journal_mode %s unavailable, using %s", value, row[0])
 
 # Database helpers 
-def init_db(conn):
+def init_db(conn, profile=None):
+    apply_profile(conn, profile)
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS articles (
@@ -35,201 +77,2770 @@ def init_db(conn):
             fetched_at TEXT
         );
     """)
-    c.execute("CREATE INDEX IF NOT EXISTS idx_url ON articles(url);")
+    migrate_dedup_keys(conn)
+    migrate_timestamps(conn)
+    init_cursors(conn)
+    init_feed_state(conn)
+    init_minhash(conn)
+    init_content(conn)
+    init_fts(conn)
     conn.commit()
 
-def insert_article(conn, article):
+# URL canonicalization: variants of the same article URL map to one dedup
+# key. Stored URLs stay as published (minus the fragment), since mirrors and
+# forced https are not guaranteed to resolve.
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ocid", "cmpid", "ref", "ref_src",
+                   "outputtype", "amp"}
+TRACKING_PREFIXES = ("utm_", "at_", "ns_")
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+HOST_ALIASES = {"edition.cnn.com": "cnn.com", "bbc.co.uk": "bbc.com"}
+DEFAULT_PORTS = {":80", ":443"}
+
+@functools.lru_cache(maxsize=65536)
+def canonical_url(url):
     """
-    article: dict with keys title, url, source, published_at, summary
-    Deduplicate by URL first, then title.
+    Canonical form of an article URL: https, lowercase host without www/m/amp
+    prefixes or default port (known mirrors aliased), no fragment, tracking
+    parameters or AMP suffix, sorted query and no trailing slash.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return url.strip()
+    host = parts.netloc.lower().rsplit("@", 1)[-1]
+    for port in DEFAULT_PORTS:
+        if host.endswith(port):
+            host = host[: -len(port)]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    host = HOST_ALIASES.get(host, host)
+    path = re.sub(r"/{2,}", "/", parts.path)
+    if path.startswith("/amp/"):
+        path = path[4:]
+    path = re.sub(r"(/amp|\.amp)/?$", "", path).rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+def strip_fragment(url):
+    """The URL as published, without its #fragment (the form that is stored)."""
+    if not url:
+        return None
+    return url.strip().split("#", 1)[0]
+
+def url_hash(url):
+    """Signed 64-bit hash of the canonical URL (the stored URL dedup key)."""
+    canon = canonical_url(url)
+    if not canon:
+        return None
+    digest = hashlib.blake2b(canon.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+def title_hash(title):
+    """Signed 64-bit hash of a case/whitespace-normalized title."""
+    if not title:
+        return None
+    norm = " ".join(title.split()).casefold()
+    digest = hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+def migrate_dedup_keys(conn, batch_size=5000):
+    """
+    Add url_hash/title_hash columns and their UNIQUE indexes to older
+    databases, replacing the earlier text url_key. Existing duplicates keep
+    NULL keys (the earliest row owns the key) so the indexes can be built
+    without deleting anything; run `dedupe` to drop them.
     """
     c = conn.cursor()
-    
-    if article.get("url"):
-        c.execute("SELECT id FROM articles WHERE url = ?", (article["url"],))
-        if c.fetchone():
-            logging.debug("Duplicate url skipped: %s", article["url"])
-            return False
-    #
-    c.execute("SELECT id FROM articles WHERE title = ?", (article["title"],))
-    if c.fetchone():
-        logging.debug("Duplicate title skipped: %s", article["title"])
+    cols = {row[1] for row in c.execute("PRAGMA table_info(articles)")}
+    if "url_hash" not in cols:
+        c.execute("ALTER TABLE articles ADD COLUMN url_hash INTEGER")
+        if "title_hash" not in cols:
+            c.execute("ALTER TABLE articles ADD COLUMN title_hash INTEGER")
+        seen_urls = set()
+        seen_titles = set()
+        last_id = 0
+        total = 0
+        while True:
+            rows = c.execute(
+                "SELECT id, url, title FROM articles WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row_id, url, title in rows:
+                uhash = url_hash(url)
+                thash = title_hash(title)
+                if uhash in seen_urls:
+                    uhash = None
+                if thash in seen_titles:
+                    thash = None
+                seen_urls.add(uhash)
+                seen_titles.add(thash)
+                updates.append((uhash, thash, row_id))
+            c.executemany("UPDATE articles SET url_hash = ?, title_hash = ? WHERE id = ?", updates)
+            last_id = rows[-1][0]
+            total += len(rows)
+        if total:
+            logging.info("Migrated dedup keys for %d existing articles", total)
+    if "url_key" in cols:
+        c.execute("DROP INDEX IF EXISTS ux_articles_url_key")
+        try:
+            c.execute("ALTER TABLE articles DROP COLUMN url_key")
+        except sqlite3.OperationalError as e:
+            # SQLite < 3.35: the column stays, unused and unindexed
+            logging.debug("Could not drop url_key: %s", e)
+    # lookups go through url_hash; an index on the raw url text is dead weight
+    c.execute("DROP INDEX IF EXISTS idx_url")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_articles_url_hash ON articles(url_hash);")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_articles_title_hash ON articles(title_hash);")
+
+def migrate_timestamps(conn, batch_size=5000):
+    """
+    Add published_ts/fetched_ts (UTC epoch seconds) next to the original
+    timestamp strings, backfill them for existing rows, and index them so
+    date filters are range scans.
+    """
+    c = conn.cursor()
+    cols = {row[1] for row in c.execute("PRAGMA table_info(articles)")}
+    if "published_ts" not in cols:
+        c.execute("ALTER TABLE articles ADD COLUMN published_ts INTEGER")
+        c.execute("ALTER TABLE articles ADD COLUMN fetched_ts INTEGER")
+        last_id = 0
+        total = 0
+        while True:
+            rows = c.execute(
+                "SELECT id, published_at, fetched_at FROM articles WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            c.executemany(
+                "UPDATE articles SET published_ts = ?, fetched_ts = ? WHERE id = ?",
+                [(to_epoch(pub), to_epoch(fetched), row_id) for row_id, pub, fetched in rows],
+            )
+            last_id = rows[-1][0]
+            total += len(rows)
+        if total:
+            logging.info("Migrated timestamps for %d existing articles", total)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_source_published ON articles(source, published_ts);")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_published_ts ON articles(published_ts);")
+
+# Full-text search index (FTS5, external content kept in sync by triggers)
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE articles_fts USING fts5(
+        title, summary, url,
+        content='articles', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    );
+    """,
+    """
+    CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, title, summary, url) VALUES (new.id, new.title, new.summary, new.url);
+    END;
+    """,
+    """
+    CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, summary, url) VALUES ('delete', old.id, old.title, old.summary, old.url);
+    END;
+    """,
+    """
+    CREATE TRIGGER articles_fts_au AFTER UPDATE OF title, summary, url ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, summary, url) VALUES ('delete', old.id, old.title, old.summary, old.url);
+        INSERT INTO articles_fts(rowid, title, summary, url) VALUES (new.id, new.title, new.summary, new.url);
+    END;
+    """,
+]
+
+def fts_available(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'").fetchone()
+    return row is not None
+
+def init_fts(conn):
+    """Create the FTS5 index and triggers; existing rows are indexed once on creation."""
+    if fts_available(conn):
+        return
+    c = conn.cursor()
+    try:
+        for stmt in FTS_SCHEMA:
+            c.execute(stmt)
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5: keyword search falls back to LIKE
+        logging.debug("FTS5 unavailable: %s", e)
+        return
+    if c.execute("SELECT 1 FROM articles LIMIT 1").fetchone():
+        rebuild_fts(conn)
+
+def rebuild_fts(conn):
+    """(Re)build the full-text index from the articles table."""
+    if not fts_available(conn):
+        logging.error("Full-text search requires SQLite with FTS5.")
         return False
+    started = time.monotonic()
+    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('optimize')")
+    conn.commit()
+    logging.info("Full-text index rebuilt in %.2fs", time.monotonic() - started)
+    return True
 
+# Near-duplicate index (MinHash-LSH over the words and word pairs of titles)
+# Copies of one story differ by a word or two in ~10-word headlines, so they
+# are matched on the Jaccard similarity of their feature sets. A title gets
+# MINHASH_BANDS band keys of MINHASH_ROWS 16-bit minhashes each; titles
+# sharing a band key are candidates, confirmed by the exact Jaccard over the
+# stored feature ids. Summaries are left out: scraped front pages have none
+# and every outlet writes its own, which would split copies of one story.
+MINHASH_BANDS = 10
+MINHASH_ROWS = 3          # bands * rows <= 30: a feature hash has 32 slots, the last two form its id
+MINHASH_THRESHOLD = 0.6
+
+def init_minhash(conn):
+    c = conn.cursor()
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_simhash'").fetchone():
+        # the earlier SimHash index; reworded headlines never matched in it
+        c.execute("DROP TRIGGER IF EXISTS article_simhash_ad")
+        c.execute("DROP TABLE article_simhash")
+        logging.info("Dropped the old SimHash index; run `cluster` to index stored articles again")
+    bands = ", ".join(f"band{i} INTEGER" for i in range(MINHASH_BANDS))
+    c.execute(f"""
+        CREATE TABLE IF NOT EXISTS article_minhash (
+            article_id INTEGER PRIMARY KEY,
+            features BLOB NOT NULL,
+            {bands},
+            cluster_id INTEGER NOT NULL
+        );
+    """)
+    for i in range(MINHASH_BANDS):
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_minhash_band{i} ON article_minhash(band{i});")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_minhash_cluster ON article_minhash(cluster_id);")
+    # deleting a cluster's representative promotes the next-oldest member
     c.execute("""
-        INSERT INTO articles (title, url, source, published_at, summary, fetched_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (
+        CREATE TRIGGER IF NOT EXISTS article_minhash_ad AFTER DELETE ON articles BEGIN
+            DELETE FROM article_minhash WHERE article_id = old.id;
+            UPDATE article_minhash SET cluster_id = (
+                SELECT MIN(article_id) FROM article_minhash WHERE cluster_id = old.id
+            ) WHERE cluster_id = old.id;
+        END;
+    """)
+
+@functools.lru_cache(maxsize=65536)
+def _feature_hashes(token):
+    return struct.unpack("<32H", hashlib.blake2b(token.encode("utf-8"), digest_size=64).digest())
+
+def minhash(title):
+    """
+    (band keys, feature ids) of a title's words and adjacent word pairs, or
+    None if it has no words. The pairs make word order count.
+    """
+    words = re.findall(r"\w+", (title or "").casefold())
+    if not words:
+        return None
+    hashes = [_feature_hashes(f) for f in set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}]
+    mins = list(map(min, zip(*hashes)))
+    bands = [
+        sum(mins[i * MINHASH_ROWS + j] << (16 * j) for j in range(MINHASH_ROWS)) for i in range(MINHASH_BANDS)
+    ]
+    return bands, sorted({h[30] | h[31] << 16 for h in hashes})
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+def _pack_features(features):
+    return struct.pack(f"<{len(features)}I", *features)
+
+def _unpack_features(blob):
+    return set(struct.unpack(f"<{len(blob) // 4}I", blob))
+
+def index_near_duplicates(conn, after_id=0, batch_size=5000):
+    """
+    Index articles with id > after_id and put each in the cluster of the
+    most similar earlier article at MINHASH_THRESHOLD or above (or its own).
+    Returns the number of articles that joined an existing cluster.
+    """
+    c = conn.cursor()
+    sql = " UNION ".join(
+        f"SELECT article_id, features, cluster_id FROM article_minhash WHERE band{i} = ? AND article_id < ?"
+        for i in range(MINHASH_BANDS)
+    )
+    joined = 0
+    while True:
+        rows = c.execute(
+            "SELECT id, title FROM articles WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+        ).fetchall()
+        if not rows:
+            break
+        for row_id, title in rows:
+            sig = minhash(title)
+            if sig is None:
+                continue
+            bands, features = sig
+            mine = set(features)
+            cluster, best = row_id, MINHASH_THRESHOLD
+            for other_id, other, other_cluster in sorted(c.execute(sql, [v for band in bands for v in (band, row_id)])):
+                score = _jaccard(mine, _unpack_features(other))
+                if score >= best and (cluster == row_id or score > best):
+                    cluster, best = other_cluster, score
+            c.execute(
+                f"INSERT OR REPLACE INTO article_minhash VALUES (?, ?, {', '.join('?' * MINHASH_BANDS)}, ?)",
+                (row_id, _pack_features(features), *bands, cluster),
+            )
+            joined += cluster != row_id
+        after_id = rows[-1][0]
+    return joined
+
+def backfill_near_duplicates(conn, rebuild=False):
+    """
+    Index every article not yet in the near-duplicate index, or all of them
+    with rebuild=True.
+    """
+    with conn:
+        if rebuild:
+            conn.execute("DELETE FROM article_minhash")
+        last = conn.execute("SELECT COALESCE(MAX(article_id), 0) FROM article_minhash").fetchone()[0]
+        joined = index_near_duplicates(conn, after_id=last)
+    clusters = conn.execute("SELECT COUNT(DISTINCT cluster_id), COUNT(*) FROM article_minhash").fetchone()
+    logging.info("Near-duplicate index: %d articles in %d clusters (%d newly joined a cluster).", clusters[1], clusters[0], joined)
+    return joined
+
+INSERT_SQL = """
+    INSERT INTO articles (title, url, source, published_at, summary, fetched_at, url_hash, title_hash, published_ts, fetched_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# On a URL match, refresh summary/published_at if the incoming copy is newer.
+UPSERT_CLAUSE = """
+    ON CONFLICT(url_hash) DO UPDATE SET
+        summary = COALESCE(NULLIF(excluded.summary, ''), articles.summary),
+        published_at = excluded.published_at,
+        published_ts = excluded.published_ts
+    WHERE excluded.published_ts IS NOT NULL
+      AND (articles.published_ts IS NULL OR excluded.published_ts > articles.published_ts)
+    ON CONFLICT DO NOTHING
+"""
+
+def _article_row(article, fetched_at):
+    return (
         article.get("title"),
         article.get("url"),
         article.get("source"),
         article.get("published_at"),
         article.get("summary"),
-        datetime.utcnow().isoformat(),
-    ))
+        fetched_at,
+        url_hash(article.get("url")),
+        title_hash(article.get("title")),
+        to_epoch(article.get("published_at")),
+        to_epoch(fetched_at),
+    )
+
+def insert_article(conn, article):
+    """
+    article: dict with keys title, url, source, published_at, summary
+    Deduplicate by URL first, then title (enforced by the UNIQUE indexes).
+    """
+    c = conn.cursor()
+    c.execute(INSERT_SQL + " ON CONFLICT DO NOTHING", _article_row(article, datetime.utcnow().isoformat()))
     conn.commit()
+    if c.rowcount != 1:
+        logging.debug("Duplicate skipped: %s", article.get("title"))
+        return False
     logging.debug("Inserted: %s", article.get("title"))
     return True
 
-# NewsAPI fetcher
-def fetch_from_newsapi(api_key, q=None, sources=None, page_size=20, max_pages=1):
-    logging.info("Fetching from NewsAPI...")
-    base = "https://newsapi.org/v2/top-headlines"
-    headers = {"Authorization": api_key}
-    results = []
-    for page in range(1, max_pages+1):
-        params = {"pageSize": page_size, "page": page}
-        if q: params["q"] = q
-        if sources and sources != "all": params["sources"] = sources
+# Seen-key prefilter: a Bloom filter over stored url_hash/title_hash values,
+# persisted next to the database and topped up from rows with id > max_id.
+SEEN_FILTER_SUFFIX = ".seen.bloom"
+SEEN_FP_RATE = 1e-6
+SEEN_MEMORY_MB = 64
+SEEN_MIN_CAPACITY = 100000
+_SEEN_MAGIC = b"NEWSBLM1"
+_SEEN_HEADER = struct.Struct("<8sQIQqQ")   # magic, bits, hashes, capacity, max_id, keys
+_TITLE_SALT = 0x9E3779B97F4A7C15
+
+class SeenFilter:
+    """
+    Bloom filter of article dedup keys. A miss means the article is certainly
+    new; a hit is dropped without touching SQLite, so a new article is lost
+    with probability fp_rate. verify=True confirms hits with one batched
+    indexed lookup per insert batch instead (exact, but no faster than
+    letting the UNIQUE indexes reject them).
+    """
+
+    def __init__(self, capacity, fp_rate=SEEN_FP_RATE, memory_mb=SEEN_MEMORY_MB, verify=False):
+        bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        budget = int(memory_mb * 8 * 1024 * 1024)
+        if bits > budget:
+            logging.warning("Seen filter capped at %s MB; false-positive rate will exceed %g", memory_mb, fp_rate)
+            bits = budget
+        self.bits = max(bits, 64)
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.array = bytearray((self.bits + 7) // 8)
+        self.keys = 0
+        self.max_id = 0
+        self.verify = verify
+        self.rejected = 0
+        self.false_positives = 0
+
+    # keys are already uniform 64-bit hashes: split into two 32-bit halves for
+    # double hashing (Kirsch-Mitzenmacher) instead of rehashing k times
+    def add(self, key):
+        key &= 0xFFFFFFFFFFFFFFFF
+        pos, step, bits, array = key & 0xFFFFFFFF, key >> 32 | 1, self.bits, self.array
+        for _ in range(self.hashes):
+            pos %= bits
+            array[pos >> 3] |= 1 << (pos & 7)
+            pos += step
+        self.keys += 1
+
+    def __contains__(self, key):
+        key &= 0xFFFFFFFFFFFFFFFF
+        pos, step, bits, array = key & 0xFFFFFFFF, key >> 32 | 1, self.bits, self.array
+        for _ in range(self.hashes):
+            pos %= bits
+            if not array[pos >> 3] & 1 << (pos & 7):
+                return False
+            pos += step
+        return True
+
+    def add_row(self, url_key, title_key):
+        if url_key is not None:
+            self.add(url_key)
+        if title_key is not None:
+            self.add(title_key ^ _TITLE_SALT)
+
+    def maybe_seen(self, url_key, title_key):
+        return (url_key is not None and url_key in self) or (title_key is not None and (title_key ^ _TITLE_SALT) in self)
+
+    def warm(self, conn, batch_size=50000):
+        """Add keys of rows stored after max_id."""
+        while True:
+            rows = conn.execute(
+                "SELECT id, url_hash, title_hash FROM articles WHERE id > ? ORDER BY id LIMIT ?", (self.max_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            for _, url_key, title_key in rows:
+                self.add_row(url_key, title_key)
+            self.max_id = rows[-1][0]
+
+    def filter_new(self, conn, rows):
+        """Drop insert rows (INSERT_SQL tuples) whose keys are already stored."""
+        hits = [r for r in rows if self.maybe_seen(r[6], r[7])]
+        if not hits:
+            return rows
+        if not self.verify:
+            stored = {id(r) for r in hits}
         else:
-            params["language"] = "en"
-        resp = requests.get(base, params=params, headers=headers, timeout=15)
-        if resp.status_code != 200:
-            logging.error("NewsAPI error: %s - %s", resp.status_code, resp.text[:200])
-            break
-        j = resp.json()
-        for a in j.get("articles", []):
-            results.append({
-                "title": a.get("title") or "",
-                "url": a.get("url"),
-                "source": (a.get("source") or {}).get("name"),
-                "published_at": a.get("publishedAt"),
-                "summary": a.get("description") or ""
-            })
-        if page * page_size >= j.get("totalResults", 0):
-            break
-    logging.info("NewsAPI fetched %d articles", len(results))
-    return results
+            urls = {r[6] for r in hits if r[6] is not None}
+            titles = {r[7] for r in hits if r[7] is not None}
+            found_urls = {k for (k,) in conn.execute(
+                "SELECT url_hash FROM articles WHERE url_hash IN (%s)" % ",".join("?" * len(urls)), list(urls))} if urls else set()
+            found_titles = {k for (k,) in conn.execute(
+                "SELECT title_hash FROM articles WHERE title_hash IN (%s)" % ",".join("?" * len(titles)), list(titles))} if titles else set()
+            stored = {id(r) for r in hits if r[6] in found_urls or r[7] in found_titles}
+            self.false_positives += len(hits) - len(stored)
+        self.rejected += len(stored)
+        return [r for r in rows if id(r) not in stored]
+
+    def save(self, path=None):
+        path = path or sidecar_path(SEEN_FILTER_SUFFIX)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_SEEN_HEADER.pack(_SEEN_MAGIC, self.bits, self.hashes, self.capacity, self.max_id, self.keys))
+            f.write(self.array)
+        os.replace(tmp, path)
+        if self.verify:
+            logging.info("Seen filter: %d duplicates rejected, %d false positives", self.rejected, self.false_positives)
+        else:
+            logging.info("Seen filter: %d duplicates rejected in memory", self.rejected)
+
+    @classmethod
+    def load(cls, conn, path=None, fp_rate=SEEN_FP_RATE, memory_mb=SEEN_MEMORY_MB, verify=False):
+        """
+        Open the sidecar filter and top it up from newer rows, or rebuild it
+        from the database if it is missing, stale (the DB was cleared) or full.
+        """
+        path = path or sidecar_path(SEEN_FILTER_SUFFIX)
+        total, last_id = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM articles").fetchone()
+        flt = None
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    magic, bits, hashes, capacity, max_id, keys = _SEEN_HEADER.unpack(f.read(_SEEN_HEADER.size))
+                    array = bytearray(f.read())
+                if magic == _SEEN_MAGIC and len(array) == (bits + 7) // 8 and max_id <= last_id and total * 2 < capacity:
+                    flt = cls.__new__(cls)
+                    flt.bits, flt.hashes, flt.capacity, flt.max_id, flt.keys, flt.array = bits, hashes, capacity, max_id, keys, array
+                    flt.verify, flt.rejected, flt.false_positives = verify, 0, 0
+            except (OSError, struct.error) as e:
+                logging.warning("Ignoring unreadable seen filter %s: %s", path, e)
+        if flt is None:
+            # two keys per row, room for the table to double before a rebuild
+            flt = cls(max(SEEN_MIN_CAPACITY, 4 * total), fp_rate, memory_mb, verify)
+        started = time.monotonic()
+        flt.warm(conn)
+        logging.debug("Seen filter ready in %.2fs (%d keys, %d bits)", time.monotonic() - started, flt.keys, flt.bits)
+        return flt
+
+def insert_articles(conn, articles, batch_size=500, on_conflict="ignore", seen=None):
+    """
+    Bulk insert an iterable of article dicts in a single transaction.
+    Duplicates (same URL, then same title) are resolved by SQLite through the
+    UNIQUE indexes. on_conflict="update" refreshes summary/published_at of an
+    existing URL when the incoming copy is newer. seen (a SeenFilter) rejects
+    already stored articles before they reach SQL in "ignore" mode.
+    Returns a list of {"inserted", "updated", "skipped"} counts, one per batch.
+    """
+    if on_conflict not in ("ignore", "update"):
+        raise ValueError(f"Unknown on_conflict mode: {on_conflict}")
+    sql = INSERT_SQL + (UPSERT_CLAUSE if on_conflict == "update" else " ON CONFLICT DO NOTHING")
+    c = conn.cursor()
+    fetched_at = datetime.utcnow().isoformat()
+    stats = []
+    batch = []
+    invalid = 0
+
+    def flush():
+        rows = batch
+        if seen is not None and on_conflict == "ignore":
+            rows = seen.filter_new(conn, batch)
+        # rowids are assigned past the current max, so new rows are id > max_id
+        max_id = c.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+        changed = 0
+        if rows:
+            c.executemany(sql, rows)
+            changed = max(c.rowcount, 0)
+        inserted = c.execute("SELECT COUNT(*) FROM articles WHERE id > ?", (max_id,)).fetchone()[0]
+        updated = changed - inserted
+        skipped = len(batch) - changed + invalid
+        if inserted:
+            index_near_duplicates(conn, after_id=max_id)
+            if seen is not None:
+                seen.warm(conn)
+        stats.append({"inserted": inserted, "updated": updated, "skipped": skipped})
+        logging.debug("Batch %d: inserted %d, updated %d, skipped %d", len(stats), inserted, updated, skipped)
+
+    with conn:
+        for article in articles:
+            if not article.get("title"):
+                invalid += 1
+            else:
+                batch.append(_article_row(article, fetched_at))
+            if len(batch) + invalid >= batch_size:
+                flush()
+                batch = []
+                invalid = 0
+        if batch or invalid:
+            flush()
+    return stats
+
+# Streaming ingest: fetchers hand articles to one writer thread that owns its
+# own connection, so rows are committed while other sources are still loading
+# and at most WRITE_QUEUE_SIZE articles are held in memory.
+WRITE_BATCH_SIZE = 500
+WRITE_MAX_DELAY = 0.5
+WRITE_QUEUE_SIZE = 5000
+_STOP = object()
+
+class ArticleWriter:
+    """
+    Single writer thread draining a bounded queue of (tag, article) into the
+    database. Pending articles are committed once batch_size have queued or
+    max_delay seconds after the first of them arrived. put() blocks while the
+    queue is full. Insert counts are kept per tag (see take_stats), including
+    "failed": articles that could not be stored, so callers can hold back
+    cursors for that tag. seen is an optional SeenFilter used only by the
+    writer thread.
+    """
+
+    def __init__(self, db_path=None, batch_size=WRITE_BATCH_SIZE, max_delay=WRITE_MAX_DELAY,
+                 maxsize=WRITE_QUEUE_SIZE, on_conflict="ignore", seen=None):
+        self.db_path = db_path or DB_PATH
+        self.seen = seen
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.on_conflict = on_conflict
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="article-writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def put(self, articles, tag=None):
+        for article in articles:
+            self.queue.put((tag, article))
+
+    def flush(self):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Commit what is left, stop the thread and return the combined counts."""
+        self.queue.put(_STOP)
+        self.thread.join()
+        return self.take_stats()
+
+    def take_stats(self, tag=...):
+        """Pop {"inserted", "updated", "skipped", "failed"} for one tag (default: all tags)."""
+        total = {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+        with self.lock:
+            tags = list(self.stats) if tag is ... else [tag]
+            for t in tags:
+                for k, v in self.stats.pop(t, {}).items():
+                    total[k] += v
+        return total
+
+    def _write(self, conn, pending):
+        for tag, articles in pending.items():
+            batches = []
+            failed = 0
+            try:
+                if conn is None:
+                    raise sqlite3.OperationalError(f"cannot open {self.db_path}")
+                batches = insert_articles(conn, articles, batch_size=self.batch_size, on_conflict=self.on_conflict,
+                                          seen=self.seen)
+            except Exception as e:
+                # a bad batch must not kill the thread: put()/flush()/close() would block forever
+                logging.error("Could not store %d articles: %s", len(articles), e)
+                failed = len(articles)
+            with self.lock:
+                acc = self.stats.setdefault(tag, {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0})
+                acc["failed"] += failed
+                for b in batches:
+                    for k in ("inserted", "updated", "skipped"):
+                        acc[k] += b[k]
+            logging.debug("Committed %d articles (%s)", len(articles) - failed, tag)
+        pending.clear()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            apply_profile(conn)
+        except Exception as e:
+            logging.error("Writer could not open %s: %s", self.db_path, e)
+            conn = None
+        pending = {}
+        count = 0
+        first = None
+        while True:
+            timeout = None if not count else max(0.0, first + self.max_delay - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is None or item is _STOP or isinstance(item, threading.Event):
+                if count:
+                    self._write(conn, pending)
+                    count = 0
+                if item is _STOP:
+                    break
+                if item is not None:
+                    item.set()
+                continue
+            tag, article = item
+            pending.setdefault(tag, []).append(article)
+            count += 1
+            if count == 1:
+                first = time.monotonic()
+            if count >= self.batch_size:
+                self._write(conn, pending)
+                count = 0
+        if conn is not None:
+            conn.close()
+
+# HTTP session shared by all fetchers (keep-alive, pooled connections)
+USER_AGENT = "Mozilla/5.0 (compatible; NewsAggregatorCLI/1.0)"
+HOST_CONCURRENCY = 4
+FETCH_DEADLINE = 60
+
+def make_session(pool_size=16):
+    import requests
+    import requests.adapters
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+# NewsAPI quota-aware rate limiting
+NEWSAPI_DAILY_QUOTA = 100       # developer plan: 100 requests per day
+NEWSAPI_RATE = 1.0              # requests per second (token refill rate)
+NEWSAPI_BURST = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+MAX_RETRY_WAIT = 60
+
+class NewsAPIError(Exception):
+    pass
+
+class QuotaExhausted(NewsAPIError):
+    pass
+
+class RateLimiter:
+    """
+    Token bucket (rate requests/sec, burst capacity) plus a daily request
+    quota. State lives in the api_quota table so limits hold across runs;
+    load()/save() must be called from the thread owning the connection,
+    acquire() may be called from any fetch thread.
+    """
+
+    def __init__(self, name="newsapi", rate=NEWSAPI_RATE, burst=NEWSAPI_BURST, daily_quota=NEWSAPI_DAILY_QUOTA):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.lock = threading.Lock()
+        self.day = self._today()
+        self.used = 0
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self.blocked_until = 0.0
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def load(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS api_quota (
+                api TEXT PRIMARY KEY,
+                day TEXT,
+                used INTEGER,
+                tokens REAL,
+                updated REAL,
+                blocked_until REAL
+            );
+        """)
+        row = conn.execute("SELECT day, used, tokens, updated, blocked_until FROM api_quota WHERE api = ?", (self.name,)).fetchone()
+        if row:
+            with self.lock:
+                self.day, self.used, self.tokens, self.updated, self.blocked_until = row
+                self.tokens = min(self.tokens, float(self.burst))
+
+    def save(self, conn):
+        with self.lock:
+            row = (self.name, self.day, self.used, self.tokens, self.updated, self.blocked_until)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO api_quota (api, day, used, tokens, updated, blocked_until) VALUES (?, ?, ?, ?, ?, ?)", row)
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
 
-# Simple scrapers (fallback) 
-def scrape_bbc(limit=20):
-    logging.info("Scraping BBC front page...")
-    url = "https://www.bbc.com"
+    def remaining(self):
+        with self.lock:
+            self._roll_day()
+            return max(0, self.daily_quota - self.used)
+
+    def block(self, seconds):
+        """Honor a Retry-After: no request is sent before now + seconds."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+    def acquire(self, max_wait=MAX_RETRY_WAIT):
+        """Take one request from the bucket and the daily quota, sleeping if needed."""
+        while True:
+            with self.lock:
+                self._roll_day()
+                if self.used >= self.daily_quota:
+                    raise QuotaExhausted(f"daily quota of {self.daily_quota} requests used up")
+                now = time.time()
+                self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = max(self.blocked_until - now, 0.0)
+                if not wait and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.used += 1
+                    return
+                if not wait:
+                    wait = (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                raise NewsAPIError(f"rate limited for another {wait:.0f}s")
+            time.sleep(wait)
+
+def _retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-    except Exception as e:
-        logging.error("BBC scrape failed: %s", e)
-        return []
-    soup = BeautifulSoup(r.text, "html.parser")
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+def request_with_retry(http, url, limiter=None, retries=MAX_RETRIES, **kwargs):
+    """
+    GET with exponential backoff on connection errors and 429/5xx responses.
+    Retry-After is honored (and shared through the limiter); other non-200
+    responses, or running out of retries, raise NewsAPIError.
+    """
+    import requests
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        delay = min(2 ** attempt + random.random(), MAX_RETRY_WAIT)
+        try:
+            resp = http.get(url, **kwargs)
+        except requests.RequestException as e:
+            error = str(e)
+        else:
+            if resp.status_code == 200:
+                return resp
+            error = f"{resp.status_code} - {resp.text[:200]}"
+            if resp.status_code not in RETRY_STATUSES:
+                raise NewsAPIError(error)
+            wait = _retry_after(resp.headers.get("Retry-After"))
+            if wait is not None:
+                delay = wait
+                if limiter is not None:
+                    limiter.block(wait)
+        if attempt == retries or delay > MAX_RETRY_WAIT:
+            raise NewsAPIError(f"giving up after {attempt + 1} attempts: {error}")
+        logging.warning("Request failed (%s), retrying in %.1fs", error, delay)
+        time.sleep(delay)
+
+# NewsAPI fetcher
+NEWSAPI_URL = "https://newsapi.org/v2/top-headlines"
+NEWSAPI_ENDPOINTS = ("top-headlines", "everything")
+
+def fetch_newsapi_page(api_key, page, q=None, sources=None, page_size=20, session=None, endpoint="top-headlines", since=None, limiter=None):
+    """
+    Fetch one NewsAPI page. Returns (articles, total_results); raises
+    NewsAPIError once retries are exhausted.
+    since: only ask for articles published at/after this UTC epoch (the
+    `everything` endpoint supports `from=`; top-headlines does not).
+    """
+    import requests
+    http = session or requests
+    params = {"pageSize": page_size, "page": page}
+    if q: params["q"] = q
+    if sources and sources != "all": params["sources"] = sources
+    else:
+        params["language"] = "en"
+    if endpoint == "everything":
+        params["sortBy"] = "publishedAt"
+        if since is not None:
+            params["from"] = datetime.fromtimestamp(since, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    url = NEWSAPI_URL.rsplit("/", 1)[0] + "/" + endpoint
+    resp = request_with_retry(http, url, limiter=limiter, params=params, headers={"Authorization": api_key}, timeout=15)
+    j = resp.json()
+    return [newsapi_article(a) for a in j.get("articles", [])], j.get("totalResults", 0)
+
+def newsapi_article(a):
+    """Map one NewsAPI article object to our article dict."""
+    return {
+        "title": a.get("title") or "",
+        "url": strip_fragment(a.get("url")),
+        "source": (a.get("source") or {}).get("name"),
+        "published_at": a.get("publishedAt"),
+        "summary": a.get("description") or ""
+    }
+
+# HTTP validator cache (conditional GETs for scraped pages)
+HTTP_CACHE_SUFFIX = ".httpcache.json"
+
+class HTTPCache:
+    """
+    Persistent ETag/Last-Modified validators keyed by URL, stored as JSON next
+    to the database. get() sends If-None-Match/If-Modified-Since and returns
+    None on 304 Not Modified so callers can skip parsing. Validators of a
+    fresh download stay pending until commit(url) confirms its items were
+    stored; otherwise the next run would get a 304 and never re-read them.
+    """
+
+    def __init__(self, path=None):
+        self.path = path = path or sidecar_path(HTTP_CACHE_SUFFIX)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning("Ignoring unreadable HTTP cache %s: %s", path, e)
+
+    def get(self, session, url, **kwargs):
+        with self.lock:
+            entry = dict(self.entries.get(url, {}))
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        r = session.get(url, headers=headers, **kwargs)
+        hit = r.status_code == 304
+        if hit:
+            r.close()
+        else:
+            r.raise_for_status()
+        with self.lock:
+            entry = self.entries.setdefault(url, {"hits": 0, "misses": 0})
+            entry["checked_at"] = datetime.utcnow().isoformat()
+            if hit:
+                self.hits += 1
+                entry["hits"] += 1
+                return None
+            self.misses += 1
+            entry["misses"] += 1
+            self.pending[url] = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+        return r
+
+    def commit(self, url, ok=True):
+        """Keep the validators of url's last download if its items were stored (else drop them)."""
+        with self.lock:
+            validators = self.pending.pop(url, None)
+            if ok and validators:
+                self.entries.setdefault(url, {"hits": 0, "misses": 0}).update(validators)
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.entries, indent=1)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+        logging.info("HTTP cache: %d not modified, %d downloaded", self.hits, self.misses)
+
+# Scraping source registry
+# Each entry is declarative: where to fetch, what to select and how to build
+# article URLs. Extra outlets can be added with a JSON file (--sources-file).
+#   type        "page" (default) scrapes an HTML front page, "feed" reads RSS/Atom
+#   selector    CSS selector matching the headline elements (pages only)
+#   link        "self" if the match is the <a>, "parent" to use the enclosing <a>
+#   join        "root" joins only root-relative hrefs ("/news/..") to base_url,
+#               "relative" resolves every href against base_url
+#   min_interval  minimum seconds between two requests to this source
+#   interval    polling interval used by `serve`, in seconds
+SOURCES = {
+    "bbc": {
+        "name": "BBC",
+        "url": "https://www.bbc.com",
+        "base_url": "https://www.bbc.com",
+        "selector": "a[href] h3",
+        "link": "parent",
+        "join": "root",
+        "min_interval": 1.0,
+        "interval": 900,
+    },
+    "cnn": {
+        "name": "CNN",
+        "url": "https://edition.cnn.com",
+        "base_url": "https://edition.cnn.com",
+        # CNN often has .cd__headline
+        "selector": "h3 a, span.cd__headline a, a[href].container__link",
+        "link": "self",
+        "join": "root",
+        "min_interval": 1.0,
+        "interval": 900,
+    },
+    "bbc-rss": {
+        "type": "feed",
+        "name": "BBC",
+        "url": "https://feeds.bbci.co.uk/news/rss.xml",
+        "base_url": "https://www.bbc.com",
+        "min_interval": 1.0,
+        "interval": 300,
+    },
+    "cnn-rss": {
+        "type": "feed",
+        "name": "CNN",
+        "url": "http://rss.cnn.com/rss/edition.rss",
+        "base_url": "https://edition.cnn.com",
+        "min_interval": 1.0,
+        "interval": 300,
+    },
+}
+
+SOURCE_DEFAULTS = {"link": "self", "join": "root", "min_interval": 0.0}
+
+def _with_defaults(cfg):
+    return {**SOURCE_DEFAULTS, "base_url": cfg["url"], **cfg}
+
+SOURCES = {key: _with_defaults(cfg) for key, cfg in SOURCES.items()}
+
+def load_sources(path):
+    """Merge source definitions from a JSON file ({key: {...}}) into SOURCES."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for key, cfg in data.items():
+        kind = cfg.get("type", "page")
+        if kind not in ("page", "feed"):
+            raise ValueError(f"Source {key!r} has an unknown type {kind!r}")
+        missing = [k for k in ("name", "url") + (("selector",) if kind == "page" else ()) if k not in cfg]
+        if missing:
+            raise ValueError(f"Source {key!r} is missing {', '.join(missing)}")
+        cfg = _with_defaults(cfg)
+        if cfg["link"] not in ("self", "parent") or cfg["join"] not in ("root", "relative"):
+            raise ValueError(f"Source {key!r} has an invalid link/join rule")
+        SOURCES[key.lower()] = cfg
+    logging.info("Loaded %d sources from %s", len(data), path)
+
+def is_feed(key):
+    return SOURCES[key].get("type") == "feed"
+
+def source_host(key):
+    return urlsplit(SOURCES[key]["url"]).netloc
+
+_last_request = {}
+_throttle_lock = threading.Lock()
+
+def _throttle(key, min_interval):
+    """Sleep so requests to one source are at least min_interval seconds apart."""
+    if not min_interval:
+        return
+    with _throttle_lock:
+        now = time.monotonic()
+        start = max(now, _last_request.get(key, 0.0) + min_interval)
+        _last_request[key] = start
+    if start > now:
+        time.sleep(start - now)
+
+def join_link(cfg, link):
+    if cfg.get("join") == "relative":
+        return urljoin(cfg["base_url"], link)
+    if link.startswith("/"):
+        return urljoin(cfg["base_url"], link)
+    return link
+
+# HTML parser backends
+# "auto" picks the fastest installed one: selectolax (lexbor) > lxml > html.parser.
+# bs4 backends only build the tree for the tags named in the source selector
+# (SoupStrainer); a source can set "strain" to its own tag list or false.
+PARSER_BACKENDS = ("auto", "selectolax", "lxml", "html.parser")
+PARSER_BACKEND = os.getenv("NEWS_PARSER", "auto")
+
+@functools.lru_cache(maxsize=None)
+def selector_tags(selector):
+    """
+    Tag names a selector needs, or None if some compound has no tag name
+    (e.g. ".card a"), in which case partial parsing is not safe.
+    """
+    plain = re.sub(r"\[[^\]]*\]|\([^)]*\)", "", selector)
+    tags = {"a"}
+    for compound in re.split(r"[\s>+~,]+", plain.strip()):
+        m = re.match(r"[a-zA-Z][a-zA-Z0-9-]*", compound)
+        if not m:
+            return None
+        tags.add(m.group(0).lower())
+    return sorted(tags)
+
+@functools.lru_cache(maxsize=None)
+def resolve_backend(name="auto"):
+    if name != "auto":
+        return name
+    for backend, module in (("selectolax", "selectolax.lexbor"), ("lxml", "lxml")):
+        try:
+            importlib.import_module(module)
+            return backend
+        except ImportError:
+            pass
+    return "html.parser"
+
+@functools.lru_cache(maxsize=None)
+def compile_selector(selector):
+    import soupsieve
+    return soupsieve.compile(selector)
+
+def _links_bs4(cfg, html, limit, features, strain):
+    from bs4 import BeautifulSoup, SoupStrainer
+    tags = cfg.get("strain", selector_tags(cfg["selector"])) if strain else None
+    soup = BeautifulSoup(html, features, parse_only=SoupStrainer(tags) if tags else None)
+    for el in compile_selector(cfg["selector"]).select(soup, limit=limit*3):
+        a = el if cfg.get("link", "self") == "self" else el.find_parent("a")
+        yield el.get_text(strip=True), (a.get("href") if a else None)
+
+def _links_selectolax(cfg, html, limit):
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+    for el in tree.css(cfg["selector"])[:limit*3]:
+        a = el
+        if cfg.get("link", "self") != "self":
+            a = el.parent
+            while a is not None and a.tag != "a":
+                a = a.parent
+        yield el.text(strip=True), (a.attributes.get("href") if a is not None else None)
+
+def headline_links(cfg, html, limit=20, backend=None, strain=True):
+    """Yield (title, href) pairs for a source's selector using the chosen parser backend."""
+    backend = resolve_backend(backend or cfg.get("parser", PARSER_BACKEND))
+    if backend == "selectolax":
+        return _links_selectolax(cfg, html, limit)
+    if backend not in ("lxml", "html.parser"):
+        raise ValueError(f"Unknown parser backend: {backend}")
+    return _links_bs4(cfg, html, limit, backend, strain)
+
+def parse_source(cfg, html, limit=20, backend=None, strain=True):
+    """Extract headline items from a page according to a source config."""
     items = []
-    
-    for h in soup.select("a[href] h3")[:limit*3]:
-        title = h.get_text(strip=True)
-        a = h.find_parent("a")
-        if not a: continue
-        link = a.get("href")
-        if link and link.startswith("/"):
-            link = "https://www.bbc.com" + link
-        items.append({"title": title, "url": link, "source": "BBC", "published_at": None, "summary": ""})
+    for title, link in headline_links(cfg, html, limit, backend, strain):
+        if not link:
+            continue
+        items.append({"title": title, "url": strip_fragment(join_link(cfg, link)), "source": cfg["name"], "published_at": None, "summary": ""})
         if len(items) >= limit:
             break
-    logging.info("BBC scraped %d items", len(items))
     return items
 
-def scrape_cnn(limit=20):
-    logging.info("Scraping CNN front page...")
-    url = "https://edition.cnn.com"
-    try:
-        r = requests.get(url, timeout=10)
+def download_source(key, session=None, cache=None):
+    """Raw page bytes of a source, or None if unchanged since the last fetch."""
+    cfg = SOURCES[key]
+    logging.info("Scraping %s (%s)...", cfg["name"], cfg["url"])
+    _throttle(key, cfg.get("min_interval", 0))
+    import requests
+    # network errors propagate so the fetch engine/scheduler can see failures
+    if cache is not None:
+        r = cache.get(session or requests, cfg["url"], timeout=10)
+    else:
+        r = (session or requests).get(cfg["url"], timeout=10)
         r.raise_for_status()
+    if r is None:
+        logging.info("%s not modified since last fetch, skipped", cfg["name"])
+        return None
+    return r.content
+
+class RawPage:
+    """A downloaded page waiting for the parse stage of the fetch engine."""
+
+    def __init__(self, key, html, limit):
+        self.key = key
+        self.cfg = SOURCES[key]
+        self.html = html
+        self.limit = limit
+        # resolved here: pool workers may not share this process's globals
+        self.backend = resolve_backend(self.cfg.get("parser", PARSER_BACKEND))
+
+    def parse_args(self):
+        return self.cfg, self.html, self.limit, self.backend
+
+def scrape_source(key, limit=20, session=None, cache=None, defer_parse=False):
+    """
+    Download and parse one source. With defer_parse the download is returned
+    as a RawPage for the fetch engine's parser pool instead.
+    """
+    html = download_source(key, session, cache)
+    if html is None:
+        return []
+    page = RawPage(key, html, limit)
+    if defer_parse:
+        return page
+    items = parse_source(*page.parse_args())
+    logging.info("%s scraped %d items", page.cfg["name"], len(items))
+    return items
+
+def _scrape_or_empty(key, limit, session):
+    try:
+        return scrape_source(key, limit, session)
     except Exception as e:
-        logging.error("CNN scrape failed: %s", e)
+        logging.error("%s scrape failed: %s", SOURCES[key]["name"], e)
         return []
-    soup = BeautifulSoup(r.text, "html.parser")
+
+def scrape_bbc(limit=20, session=None):
+    return _scrape_or_empty("bbc", limit, session)
+
+def scrape_cnn(limit=20, session=None):
+    return _scrape_or_empty("cnn", limit, session)
+
+# RSS/Atom feeds
+# Feeds are stream-parsed chunk by chunk (XMLPullParser, each item cleared once
+# read). Feed order is editorial, not chronological, so every poll reads the
+# whole feed and skips the GUIDs already stored; feed_state keeps the most
+# recent FEED_SEEN_GUIDS of them per feed as a JSON list.
+FEED_CHUNK_SIZE = 16384
+FEED_SEEN_GUIDS = 1000
+
+def init_feed_state(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS feed_state (
+            feed_key TEXT PRIMARY KEY,
+            seen_guids TEXT,
+            updated_at TEXT
+        );
+    """)
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(feed_state)")}
+    if "last_guid" in cols and "seen_guids" not in cols:
+        # older databases kept only the first GUID of the previous poll
+        conn.execute("ALTER TABLE feed_state ADD COLUMN seen_guids TEXT")
+        conn.execute("UPDATE feed_state SET seen_guids = json_array(last_guid) WHERE last_guid IS NOT NULL")
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1].lower()
+
+def _feed_text(text):
+    """Plain text of a feed field that may carry escaped HTML."""
+    return " ".join(unescape(re.sub(r"<[^>]+>", " ", text or "")).split())
+
+def _feed_date(text):
+    if not text:
+        return None
+    try:
+        dt = parsedate_to_datetime(text)        # RSS: RFC 822
+    except (TypeError, ValueError):
+        dt = None
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    dt = dt.astimezone(timezone.utc) if dt else to_utc_datetime(text)   # Atom: RFC 3339
+    return dt.isoformat() if dt else None
+
+def parse_feed(cfg, chunks, seen=(), limit=50):
+    """
+    Stream-parse an RSS 2.0 or Atom feed from an iterable of byte chunks.
+    Returns (articles, guids): the first limit items whose GUID is not in
+    seen, and their GUIDs. Items past the limit are left for the next poll.
+    """
+    from xml.etree.ElementTree import XMLPullParser, ParseError
+    parser = XMLPullParser(events=("end",))
     items = []
-    # CNN often has .cd__headline
-    for a in soup.select("h3 a, span.cd__headline a, a[href].container__link")[:limit*3]:
-        title = a.get_text(strip=True)
-        link = a.get("href")
-        if not link:
-            continue
-        if link.startswith("/"):
-            link = "https://edition.cnn.com" + link
-        items.append({"title": title, "url": link, "source": "CNN", "published_at": None, "summary": ""})
-        if len(items) >= limit:
-            break
-    logging.info("CNN scraped %d items", len(items))
+    guids = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            if _local_name(el.tag) not in ("item", "entry"):
+                continue
+            fields = {}
+            for child in el:
+                name = _local_name(child.tag)
+                if name == "link":
+                    href = child.get("href")
+                    if href is not None and child.get("rel", "alternate") != "alternate":
+                        continue
+                    fields.setdefault("link", (href or child.text or "").strip())
+                else:
+                    fields.setdefault(name, (child.text or "").strip())
+            el.clear()
+            guid = fields.get("guid") or fields.get("id") or fields.get("link")
+            if guid in seen:
+                continue
+            title = _feed_text(fields.get("title"))
+            if title and fields.get("link"):
+                items.append({
+                    "title": title,
+                    "url": strip_fragment(join_link(cfg, fields["link"])),
+                    "source": cfg["name"],
+                    "published_at": _feed_date(fields.get("pubdate") or fields.get("published") or fields.get("updated")),
+                    "summary": _feed_text(fields.get("description") or fields.get("summary") or fields.get("content")),
+                })
+                guids.append(guid)
+            if len(items) >= limit:
+                return items, guids
+    try:
+        parser.close()
+    except ParseError as e:
+        logging.warning("%s feed ended early: %s", cfg["name"], e)
+    return items, guids
+
+def fetch_feed(key, state, limit=50, session=None, cache=None):
+    """Download and parse one feed; the GUIDs read are left in state["next"] for FeedPoller.finish."""
+    cfg = SOURCES[key]
+    logging.info("Reading feed %s (%s)...", cfg["name"], cfg["url"])
+    _throttle(key, cfg.get("min_interval", 0))
+    import requests
+    if cache is not None:
+        r = cache.get(session or requests, cfg["url"], timeout=10, stream=True)
+    else:
+        r = (session or requests).get(cfg["url"], timeout=10, stream=True)
+        r.raise_for_status()
+    if r is None:
+        logging.info("%s feed not modified since last fetch, skipped", cfg["name"])
+        return []
+    try:
+        items, guids = parse_feed(cfg, r.iter_content(FEED_CHUNK_SIZE), seen=state["seen"], limit=limit)
+    finally:
+        r.close()
+    state["next"] = guids
+    # stopped at the limit: keep the validators out of the cache so the
+    # next poll downloads the feed again instead of getting a 304
+    state["truncated"] = len(items) >= limit
+    logging.info("%s feed: %d new items", cfg["name"], len(items))
     return items
 
+class FeedPoller:
+    """
+    Incremental polling of feed sources. jobs() loads the GUIDs each feed
+    already delivered; finish() adds the new ones once the items are saved,
+    so a failed store re-reads them next time. A poll cut short by the limit
+    does not keep the feed's cache validators, so the rest is read next time
+    instead of hitting a 304. full=True ignores the saved GUIDs.
+    """
+
+    def __init__(self, keys, limit=50, session=None, cache=None, full=False):
+        self.keys = keys
+        self.limit = limit
+        self.session = session
+        self.cache = cache
+        self.full = full
+        self.states = {}
+
+    def jobs(self, conn):
+        self.states = {}
+        for key in self.keys:
+            row = conn.execute("SELECT seen_guids FROM feed_state WHERE feed_key = ?", (key,)).fetchone()
+            recent = json.loads(row[0]) if row and row[0] and not self.full else []
+            self.states[key] = {"recent": recent, "seen": set(recent)}
+        return [
+            (f"{SOURCES[key]['name']} feed", source_host(key),
+             functools.partial(fetch_feed, key, self.states[key], self.limit, self.session, self.cache))
+            for key in self.keys
+        ]
+
+    def finish(self, conn, ok=True):
+        if self.cache is not None:
+            for key in self.keys:
+                self.cache.commit(SOURCES[key]["url"], ok and not self.states.get(key, {}).get("truncated"))
+        if not ok:
+            return
+        now = datetime.utcnow().isoformat()
+        rows = []
+        for key, st in self.states.items():
+            if st.get("next"):
+                new = set(st["next"])
+                recent = st["next"] + [g for g in st["recent"] if g not in new]
+                rows.append((key, json.dumps(recent[:FEED_SEEN_GUIDS]), now))
+        with conn:
+            conn.executemany("""
+                INSERT INTO feed_state (feed_key, seen_guids, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(feed_key) DO UPDATE SET seen_guids = excluded.seen_guids, updated_at = excluded.updated_at
+            """, rows)
+
+# Concurrent fetch engine
+# Fetch jobs run in threads; a job returning a RawPage hands its HTML to a
+# bounded queue drained into a process pool, so CPU-bound parsing of one page
+# overlaps the downloads of the others and spreads across cores. When the
+# queue is full, fetchers wait (holding their host slot) until a parser frees up.
+PARSE_WORKERS = int(os.getenv("NEWS_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+PARSE_QUEUE_SIZE = 0   # 0 = twice the worker count
+_parse_pool = None
+
+def parse_pool():
+    """
+    Process pool shared by all fetch cycles (None when PARSE_WORKERS is 0).
+    It is created lazily, once fetch, writer and scheduler threads already
+    run, so workers are started by a forkserver (spawn where there is none):
+    forking a threaded process can copy locks held by other threads.
+    """
+    global _parse_pool
+    if PARSE_WORKERS <= 0:
+        return None
+    if _parse_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _parse_pool
+
+def fetch_jobs(jobs, deadline=FETCH_DEADLINE, host_limit=HOST_CONCURRENCY, sink=None):
+    """
+    Run fetch jobs concurrently and return one result per job (None if it
+    failed or timed out). jobs: list of (name, host, func) where func()
+    returns a list of articles (or a RawPage to parse). At most host_limit
+    jobs run against the same host at once; jobs still running when the
+    deadline expires are abandoned and logged (they run on daemon threads,
+    so they do not keep the process alive past it). With sink, each job's
+    articles are passed to sink(index, articles) as soon as they are ready
+    and its result is the article count instead.
+    """
+    import asyncio
+    return asyncio.run(_fetch_jobs(jobs, deadline, host_limit, sink))
+
+def _in_thread(loop, func, *args):
+    """
+    Run func(*args) on a daemon thread and return an asyncio future for it.
+    Unlike executor threads, which are joined at exit, a job abandoned at
+    the deadline cannot keep the process alive.
+    """
+    future = loop.create_future()
+
+    def resolve(setter, value):
+        if not future.done():
+            setter(value)
+
+    def target():
+        try:
+            outcome = (future.set_result, func(*args))
+        except Exception as e:
+            outcome = (future.set_exception, e)
+        try:
+            loop.call_soon_threadsafe(resolve, *outcome)
+        except RuntimeError:
+            pass    # the loop is closed: the caller gave up on this job
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+async def _fetch_jobs(jobs, deadline, host_limit, sink=None):
+    import asyncio
+    from concurrent.futures.process import BrokenProcessPool
+    from pickle import PicklingError
+    loop = asyncio.get_running_loop()
+    pool = parse_pool()
+    pages = asyncio.Queue(maxsize=PARSE_QUEUE_SIZE or 2 * max(1, PARSE_WORKERS))
+    limits = {}
+
+    async def run(index, name, host, func):
+        sem = limits.setdefault(host, asyncio.Semaphore(host_limit))
+        try:
+            async with sem:
+                result = await _in_thread(loop, func)
+                if isinstance(result, RawPage):
+                    parsed = loop.create_future()
+                    await pages.put((result, parsed))
+            if isinstance(result, RawPage):
+                page, result = result, await parsed
+                logging.info("%s scraped %d items", page.cfg["name"], len(result))
+        except Exception as e:
+            logging.error("%s fetch failed: %s", name, e)
+            return None
+        if sink is None:
+            return result
+        # blocking hand-off (bounded writer queue) runs off the event loop
+        await _in_thread(loop, sink, index, result or [])
+        return len(result or [])
+
+    async def parser():
+        nonlocal pool
+        while True:
+            page, parsed = await pages.get()
+            try:
+                if pool is not None:
+                    try:
+                        items = await loop.run_in_executor(pool, parse_source, *page.parse_args())
+                    except (PicklingError, BrokenProcessPool) as e:
+                        logging.warning("Parser pool unavailable (%s), parsing in threads", e)
+                        pool = None
+                if pool is None:
+                    items = await _in_thread(loop, parse_source, *page.parse_args())
+            except Exception as e:
+                if not parsed.done():
+                    parsed.set_exception(e)
+            else:
+                if not parsed.done():
+                    parsed.set_result(items)
+            pages.task_done()
+
+    parsers = [asyncio.create_task(parser()) for _ in range(max(1, PARSE_WORKERS))]
+    tasks = [asyncio.create_task(run(i, *job)) for i, job in enumerate(jobs)]
+    started = time.monotonic()
+    done, pending = await asyncio.wait(tasks, timeout=deadline) if tasks else (set(), set())
+    for (name, _, _), task in zip(jobs, tasks):
+        if task in pending:
+            logging.warning("%s did not finish within %ss deadline, skipped", name, deadline)
+            task.cancel()
+    for task in parsers:
+        task.cancel()
+
+    results = [task.result() if task in done else None for task in tasks]
+    fetched = sum(r if isinstance(r, int) else len(r) for r in results if r)
+    logging.info("Fetched %d articles from %d jobs in %.2fs", fetched, len(jobs), time.monotonic() - started)
+    return results
+
+# Incremental NewsAPI polling with per-query high-water-mark cursors
+def init_cursors(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS newsapi_cursors (
+            query_key TEXT PRIMARY KEY,
+            newest_ts INTEGER,
+            updated_at TEXT
+        );
+    """)
+
+def load_cursor(conn, key):
+    row = conn.execute("SELECT newest_ts FROM newsapi_cursors WHERE query_key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def save_cursor(conn, key, newest_ts):
+    with conn:
+        conn.execute("""
+            INSERT INTO newsapi_cursors (query_key, newest_ts, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(query_key) DO UPDATE SET newest_ts = MAX(newest_ts, excluded.newest_ts), updated_at = excluded.updated_at
+        """, (key, newest_ts, datetime.utcnow().isoformat()))
+
+class NewsAPIQuery:
+    """
+    One NewsAPI query and its cursor: the newest publishedAt already stored.
+    Without a cursor all pages are requested concurrently; with one, pages
+    of the `everything` endpoint (sorted by publishedAt) are walked in
+    order, older items are dropped and paging stops at the first page that
+    holds nothing newer than the cursor. top-headlines is ranked, not
+    sorted, so its granted pages are always fetched in full and the unique
+    indexes drop what is already stored.
+    """
+
+    def __init__(self, api_key, q=None, sources=None, page_size=20, max_pages=1, endpoint="top-headlines", session=None,
+                 priority=1, limiter=None):
+        self.api_key = api_key
+        self.q = q
+        self.sources = sources
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = max_pages      # pages granted this cycle (see plan_queries)
+        self.endpoint = endpoint
+        self.session = session
+        self.priority = priority
+        self.limiter = limiter
+        self.key = f"{endpoint}|q={q or ''}|sources={sources or ''}|size={page_size}"
+        self.since = None
+        self.newest = None
+        self.lock = threading.Lock()
+
+    def load(self, conn):
+        self.since = load_cursor(conn, self.key)
+        self.newest = self.since
+
+    def save(self, conn):
+        if self.newest is not None and self.newest != self.since:
+            save_cursor(conn, self.key, self.newest)
+            self.since = self.newest
+
+    def _page(self, page):
+        articles, total = fetch_newsapi_page(self.api_key, page, q=self.q, sources=self.sources, page_size=self.page_size,
+                                             session=self.session, endpoint=self.endpoint, since=self.since,
+                                             limiter=self.limiter)
+        stamps = [to_epoch(a["published_at"]) for a in articles]
+        with self.lock:
+            for ts in stamps:
+                if ts is not None and (self.newest is None or ts > self.newest):
+                    self.newest = ts
+        return articles, stamps, total
+
+    def _page_articles(self, page):
+        return self._page(page)[0]
+
+    def _fetch_incremental(self):
+        results = []
+        for page in range(1, self.pages+1):
+            articles, stamps, total = self._page(page)
+            fresh = [a for a, ts in zip(articles, stamps) if ts is None or ts >= self.since]
+            results.extend(fresh)
+            if not articles or all(ts is not None and ts <= self.since for ts in stamps):
+                logging.info("NewsAPI page %d has nothing newer than the cursor, stopping", page)
+                break
+            if page * self.page_size >= total:
+                break
+        logging.info("NewsAPI incremental fetch: %d new articles", len(results))
+        return results
+
+    def jobs(self):
+        host = urlsplit(NEWSAPI_URL).netloc
+        if self.since is not None and self.endpoint == "everything":
+            return [("NewsAPI (incremental)", host, self._fetch_incremental)]
+        # no cursor yet, or a ranked endpoint: request every page concurrently
+        return [
+            (f"NewsAPI page {page}", host, functools.partial(self._page_articles, page))
+            for page in range(1, self.pages+1)
+        ]
+
+def plan_queries(queries, remaining):
+    """
+    Grant NewsAPI pages to queries in descending priority until the day's
+    remaining quota is spent; low-priority queries are trimmed first.
+    """
+    budget = remaining
+    for q in sorted(queries, key=lambda q: -q.priority):
+        q.pages = min(q.max_pages, budget)
+        budget -= q.pages
+        if q.pages < q.max_pages:
+            logging.warning("NewsAPI budget low: query %r (priority %s) gets %d of %d pages", q.q, q.priority, q.pages, q.max_pages)
+    return [q for q in queries if q.pages > 0]
+
+def plan_newsapi(conn, queries, limiter, full=False):
+    """Load quota and cursor state, then return fetch jobs for the queries that fit today's budget."""
+    limiter.load(conn)
+    for q in queries:
+        if not full:
+            q.load(conn)
+    remaining = limiter.remaining()
+    logging.info("NewsAPI quota: %d of %d requests left today", remaining, limiter.daily_quota)
+    return [job for q in plan_queries(queries, remaining) for job in q.jobs()]
+
+def finish_newsapi(conn, queries, limiter, ok=True):
+    """Persist quota use; advance cursors only if every page was fetched and stored."""
+    if ok:
+        for q in queries:
+            q.save(conn)
+    limiter.save(conn)
+
+def seen_filter(conn, args):
+    """The SeenFilter requested by fetch/serve options (None with --no-bloom)."""
+    if args.no_bloom:
+        return None
+    return SeenFilter.load(conn, fp_rate=args.bloom_fp_rate, memory_mb=args.bloom_memory, verify=args.bloom_verify)
+
+def source_jobs(keys, limit=20, session=None, cache=None):
+    """One fetch job per registered scraping source."""
+    return [
+        (SOURCES[key]["name"], source_host(key), functools.partial(scrape_source, key, limit, session, cache, defer_parse=True))
+        for key in keys
+    ]
+
+def parse_query_spec(spec):
+    """'TEXT[:PRIORITY]' -> (text, priority)."""
+    text, sep, prio = spec.rpartition(":")
+    if sep and prio.strip().lstrip("-").isdigit():
+        return text, int(prio)
+    return spec, 1
+
+def newsapi_queries(args, sources, session):
+    """NewsAPIQuery objects for --keyword and every --query, sharing one rate limiter."""
+    limiter = RateLimiter(rate=args.rate, daily_quota=args.daily_quota)
+    specs = [(args.keyword, 1)] if args.keyword or not args.query else []
+    specs += [parse_query_spec(q) for q in args.query or []]
+    queries = [
+        NewsAPIQuery(args.newsapi_key, q=text, sources=sources, page_size=args.limit, max_pages=args.pages,
+                     endpoint=args.newsapi_endpoint, session=session, priority=prio, limiter=limiter)
+        for text, prio in specs
+    ]
+    return queries, limiter
+
+def select_sources(spec):
+    """
+    Split a --source value into (registry keys, NewsAPI sources or None).
+    "all" leaves out page sources of outlets that also have a feed (same
+    name), so an outlet is not fetched twice; name the page key to get both.
+    """
+    if spec == "all":
+        feeds = {cfg["name"] for key, cfg in SOURCES.items() if is_feed(key)}
+        return [key for key, cfg in SOURCES.items() if is_feed(key) or cfg["name"] not in feeds], None
+    wanted = [s.strip() for s in spec.split(",") if s.strip()]
+    keys = [s.lower() for s in wanted if s.lower() in SOURCES]
+    others = [s for s in wanted if s.lower() not in SOURCES]
+    return keys, (",".join(others) if others else None)
+
+# Article enrichment: fetch each new article page once and fill in the
+# publish time and description scrapers cannot see on a front page. Pages
+# are cached in article_content by canonical URL hash, including failures.
+ENRICH_HOST_CONCURRENCY = 2
+ENRICH_DEADLINE = 120
+ENRICH_MAX_BODY = 200000    # characters of main text kept per article
+ENRICH_MAX_BYTES = 2000000  # bytes of a page downloaded; the rest is not read
+DATE_META = ("article:published_time", "og:published_time", "datePublished", "pubdate", "publishdate", "date", "dc.date")
+DESCRIPTION_META = ("og:description", "description", "twitter:description")
+
+def init_content(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_content (
+            url_hash INTEGER PRIMARY KEY,
+            url TEXT,
+            status INTEGER,
+            fetched_at TEXT,
+            published_at TEXT,
+            description TEXT,
+            body TEXT
+        );
+    """)
+
+def _json_ld_articles(data):
+    """Yield schema.org *Article objects from a parsed JSON-LD document."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_articles(item)
+    elif isinstance(data, dict):
+        if "@graph" in data:
+            yield from _json_ld_articles(data["@graph"])
+        kind = data.get("@type")
+        kinds = kind if isinstance(kind, list) else [kind]
+        if any(isinstance(k, str) and k.endswith("Article") for k in kinds):
+            yield data
+
+def extract_article(html):
+    """
+    Publish time, description and main text of an article page, from JSON-LD
+    (NewsArticle and friends) first, then <meta> tags, then <article>/<p> text.
+    """
+    from bs4 import BeautifulSoup
+    features = "html.parser" if resolve_backend(PARSER_BACKEND) == "html.parser" else "lxml"
+    soup = BeautifulSoup(html, features)
+    found = {"published_at": None, "description": None, "body": None}
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        for art in _json_ld_articles(data):
+            found["published_at"] = found["published_at"] or art.get("datePublished")
+            found["description"] = found["description"] or art.get("description")
+            found["body"] = found["body"] or art.get("articleBody")
+    meta = {}
+    for tag in soup.find_all("meta"):
+        name = (tag.get("property") or tag.get("name") or tag.get("itemprop") or "").lower()
+        if name and tag.get("content") and name not in meta:
+            meta[name] = tag["content"].strip()
+    if not found["published_at"]:
+        found["published_at"] = next((meta[k.lower()] for k in DATE_META if k.lower() in meta), None)
+        if not found["published_at"]:
+            t = soup.find("time", datetime=True)
+            found["published_at"] = t["datetime"] if t else None
+    if not found["description"]:
+        found["description"] = next((meta[k] for k in DESCRIPTION_META if k in meta), None)
+    if not found["body"]:
+        root = soup.find("article") or soup.body or soup
+        paragraphs = [p.get_text(" ", strip=True) for p in root.find_all("p")]
+        found["body"] = "\n\n".join(p for p in paragraphs if p) or None
+    ts = to_utc_datetime(found["published_at"]) if isinstance(found["published_at"], str) else None
+    found["published_at"] = ts.isoformat() if ts else None
+    if found["body"]:
+        found["body"] = found["body"][:ENRICH_MAX_BODY]
+    return found
+
+def fetch_article_page(url, session=None):
+    """
+    Download and extract one article page; HTTP errors are returned as a
+    status, not raised. At most ENRICH_MAX_BYTES are read: metadata sits in
+    <head>, so a truncated page still yields it.
+    """
+    import requests
+    r = (session or requests).get(url, timeout=15, stream=True)
+    try:
+        content = {"url": url, "status": r.status_code, "published_at": None, "description": None, "body": None}
+        if r.ok and "html" in r.headers.get("Content-Type", "text/html"):
+            chunks, size = [], 0
+            for chunk in r.iter_content(65536):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= ENRICH_MAX_BYTES:
+                    logging.debug("%s is larger than %d bytes, truncated", url, ENRICH_MAX_BYTES)
+                    break
+            content.update(extract_article(b"".join(chunks)[:ENRICH_MAX_BYTES]))
+    finally:
+        r.close()
+    return [content]
+
+def enrich_articles(conn, after_id=None, limit=None, session=None, host_limit=ENRICH_HOST_CONCURRENCY,
+                    deadline=ENRICH_DEADLINE):
+    """
+    Fill empty summary/published_at of articles (those with id > after_id, or
+    every article still missing one) from their pages. Each canonical URL is
+    fetched at most once; later calls reuse article_content.
+    Returns the number of articles updated.
+    """
+    q = """
+        SELECT a.id, a.url, a.url_hash, a.summary, a.published_ts FROM articles a
+        WHERE a.url IS NOT NULL AND a.url_hash IS NOT NULL AND (a.summary IS NULL OR a.summary = '' OR a.published_ts IS NULL)
+    """
+    params = []
+    if after_id is not None:
+        q += " AND a.id > ?"
+        params.append(after_id)
+    else:
+        q += " AND NOT EXISTS (SELECT 1 FROM article_content ac WHERE ac.url_hash = a.url_hash)"
+    q += " ORDER BY a.id DESC"
+    if limit:
+        q += " LIMIT ?"
+        params.append(limit)
+    rows = conn.execute(q, params).fetchall()
+    if not rows:
+        return 0
+    keys = list({r[2] for r in rows})
+    content = {}
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        for key, status, published_at, description in conn.execute(
+            "SELECT url_hash, status, published_at, description FROM article_content WHERE url_hash IN (%s)"
+            % ",".join("?" * len(chunk)), chunk,
+        ):
+            content[key] = (status, published_at, description)
+    todo = {}
+    for _, url, key, _, _ in rows:
+        if key not in content:
+            todo.setdefault(key, url)
+    pages = []
+    if todo:
+        own_session = session is None
+        session = session or make_session()
+        jobs = [(url, urlsplit(url).netloc, functools.partial(fetch_article_page, url, session)) for url in todo.values()]
+        results = fetch_jobs(jobs, deadline=deadline, host_limit=host_limit)
+        if own_session:
+            session.close()
+        fetched_at = datetime.utcnow().isoformat()
+        pages = [(key, result[0]) for key, result in zip(todo, results) if result]
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO article_content (url_hash, url, status, fetched_at, published_at, description, body)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(key, c["url"], c["status"], fetched_at, c["published_at"], c["description"], c["body"]) for key, c in pages])
+        content.update((key, (c["status"], c["published_at"], c["description"])) for key, c in pages)
+    updates = []
+    for row_id, _, key, summary, published_ts in rows:
+        status, published_at, description = content.get(key, (None, None, None))
+        if not status or not 200 <= status < 300:
+            continue
+        description = description if not summary else None
+        published_at = published_at if published_ts is None else None
+        if description or published_at:
+            updates.append((description, published_at, to_epoch(published_at), row_id))
+    with conn:
+        conn.executemany("""
+            UPDATE articles SET
+                summary = COALESCE(?, summary),
+                published_at = COALESCE(?, published_at),
+                published_ts = COALESCE(?, published_ts)
+            WHERE id = ?
+        """, updates)
+    downloaded = sum(1 for _, c in pages if 200 <= c["status"] < 300)
+    logging.info("Enriched %d of %d articles (%d pages downloaded, %d failed, %d from cache)", len(updates), len(rows),
+                 downloaded, len(todo) - downloaded, len(keys) - len(todo))
+    return len(updates)
+
+def fetch_and_store(groups, writer, deadline=FETCH_DEADLINE, host_limit=HOST_CONCURRENCY):
+    """
+    groups: list of (tag, jobs, after). Run every group's jobs concurrently,
+    stream their articles to writer under the group's tag and wait until they
+    are committed; then call after(ok=...) where ok is False if a job of the
+    group failed or some of its articles could not be stored (cursors, feed
+    GUIDs and HTTP validators must not move past unstored rows).
+    Returns {tag: (stats, ok)}.
+    """
+    jobs, owners = [], []
+    for tag, group_jobs, _ in groups:
+        jobs += group_jobs
+        owners += [tag] * len(group_jobs)
+    results = fetch_jobs(jobs, deadline, host_limit, sink=lambda i, articles: writer.put(articles, tag=owners[i]))
+    writer.flush()
+    outcome = {}
+    for tag, _, after in groups:
+        stats = writer.take_stats(tag)
+        ok = stats["failed"] == 0 and not any(r is None for r, owner in zip(results, owners) if owner == tag)
+        if after:
+            after(ok=ok)
+        outcome[tag] = (stats, ok)
+    return outcome
+
+# Daemon mode: long-running scheduler with per-source polling intervals
+SCHEDULE_STATE_SUFFIX = ".schedule.json"
+DEFAULT_INTERVAL = 900
+NEWSAPI_INTERVAL = 1800
+MAX_BACKOFF = 6 * 3600
+
+class Scheduler:
+    """
+    Poll each task on its own interval (with jitter) inside one process,
+    reusing the HTTP session and DB connection. Articles are stored as they
+    arrive by an ArticleWriter thread. A task that fails is retried
+    with exponential backoff capped at MAX_BACKOFF. The schedule state is
+    written to state_path after every cycle (see the `status` command).
+    """
+
+    def __init__(self, conn, state_path=None, jitter=0.1, deadline=FETCH_DEADLINE,
+                 host_limit=HOST_CONCURRENCY, on_conflict="ignore", cache=None, writer=None, enrich=None):
+        self.conn = conn
+        self.state_path = state_path or sidecar_path(SCHEDULE_STATE_SUFFIX)
+        self.jitter = jitter
+        self.deadline = deadline
+        self.host_limit = host_limit
+        self.on_conflict = on_conflict
+        self.cache = cache
+        self.writer = writer or ArticleWriter(on_conflict=on_conflict).start()
+        self.enrich = enrich    # enrich(conn, after_id) runs on each cycle's new rows
+        self.tasks = {}
+        self.factories = {}
+        self.after = {}
+
+    def add(self, name, jobs_factory, interval, after=None):
+        """
+        jobs_factory() returns the fetch jobs for one poll of this task;
+        after(ok=...), if given, runs once its articles are stored (see
+        fetch_and_store).
+        """
+        self.factories[name] = jobs_factory
+        self.after[name] = after
+        self.tasks[name] = {
+            "interval": interval,
+            "next_run": time.time(),
+            "last_run": None,
+            "last_stored": 0,
+            "last_error": None,
+            "failures": 0,
+            "runs": 0,
+            "stored_total": 0,
+        }
+
+    def _next_delay(self, task):
+        delay = task["interval"]
+        if task["failures"]:
+            delay = min(delay * 2 ** task["failures"], MAX_BACKOFF)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_due(self):
+        now = time.time()
+        due = [name for name, t in self.tasks.items() if t["next_run"] <= now]
+        if not due:
+            return 0
+        first_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+        groups = [(name, self.factories[name](), self.after[name]) for name in due]
+        outcome = fetch_and_store(groups, self.writer, self.deadline, self.host_limit)
+        stored = 0
+        for name in due:
+            task = self.tasks[name]
+            stats, ok = outcome[name]
+            failed = not ok
+            count = stats["inserted"]
+            task["runs"] += 1
+            task["last_run"] = now
+            task["last_stored"] = count
+            task["stored_total"] += count
+            task["failures"] = task["failures"] + 1 if failed else 0
+            task["last_error"] = None if ok else ("store failed" if stats["failed"] else "fetch failed")
+            task["next_run"] = time.time() + self._next_delay(task)
+            stored += count
+            logging.info("%s: stored %d new articles, next poll in %.0fs", name, count, task["next_run"] - time.time())
+        if self.enrich and stored:
+            self.enrich(self.conn, after_id=first_id)
+        if self.cache is not None:
+            self.cache.save()
+        if self.writer.seen is not None:
+            self.writer.seen.save()
+        self.save_state()
+        return stored
+
+    def save_state(self):
+        state = {"pid": os.getpid(), "updated_at": time.time(), "tasks": self.tasks}
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.state_path)
+
+    def run_forever(self, stop):
+        """Run until the threading.Event `stop` is set."""
+        logging.info("Scheduler started with %d tasks", len(self.tasks))
+        try:
+            while not stop.is_set():
+                self.run_due()
+                wait = min(t["next_run"] for t in self.tasks.values()) - time.time()
+                stop.wait(max(wait, 1.0))
+        finally:
+            self.writer.close()
+        logging.info("Scheduler stopped.")
+
+def print_schedule(state_path=None):
+    state_path = state_path or sidecar_path(SCHEDULE_STATE_SUFFIX)
+    if not os.path.exists(state_path):
+        print("No scheduler state found (is `serve` running?)")
+        return
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    now = time.time()
+    print(f"Scheduler pid {state['pid']}, updated {now - state['updated_at']:.0f}s ago")
+    for name, t in state["tasks"].items():
+        last = f"{now - t['last_run']:.0f}s ago" if t["last_run"] else "never"
+        status = f"FAILING x{t['failures']}" if t["failures"] else "ok"
+        print(f"  {name:<12} every {t['interval']:>6.0f}s  last {last:<10} next in {t['next_run'] - now:>6.0f}s  "
+              f"stored {t['last_stored']}/{t['stored_total']}  {status}")
+
 # Query and export functions 
-def query_articles(conn, source=None, keyword=None, start_date=None, end_date=None, limit=100):
-    c = conn.cursor()
-    q = "SELECT id, title, url, source, published_at, summary, fetched_at FROM articles WHERE 1=1"
+ARTICLE_COLUMNS = ["id", "title", "url", "source", "published_at", "summary", "fetched_at"]
+EXCEL_MAX_ROWS = 1048576
+
+def iter_articles(conn, source=None, keyword=None, start_date=None, end_date=None, limit=None, chunk_size=1000,
+                  collapse=False):
+    """
+    Yield matching articles as dicts, fetching chunk_size rows at a time from
+    the cursor so memory stays constant regardless of result size.
+    keyword uses FTS5 query syntax when available: words, "exact phrases",
+    prefix*, AND/OR/NOT. Matches are ranked by bm25 (title weighted highest).
+    collapse=True returns only the representative (oldest) article of each
+    near-duplicate cluster.
+    """
+    use_fts = bool(keyword) and fts_available(conn)
+    q = "SELECT a.id, a.title, a.url, a.source, a.published_at, a.summary, a.fetched_at FROM articles a"
     params = []
+    if use_fts:
+        q += " JOIN articles_fts ON articles_fts.rowid = a.id WHERE articles_fts MATCH ?"
+        params.append(keyword)
+    else:
+        q += " WHERE 1=1"
     if source:
-        q += " AND source LIKE ?"
-        params.append(f"%{source}%")
-    if keyword:
-        q += " AND (title LIKE ? OR summary LIKE ? OR url LIKE ?)"
+        # resolve the substring match to exact names so (source, published_ts) is usable
+        names = matching_sources(conn, source)
+        q += " AND a.source IN (%s)" % ",".join("?" * len(names)) if names else " AND 0"
+        params.extend(names)
+    if keyword and not use_fts:
+        q += " AND (a.title LIKE ? OR a.summary LIKE ? OR a.url LIKE ?)"
         like = f"%{keyword}%"
         params.extend([like, like, like])
+    if collapse:
+        q += " AND NOT EXISTS (SELECT 1 FROM article_minhash s WHERE s.article_id = a.id AND s.cluster_id != a.id)"
     if start_date:
-        # compare ISO stored strings
-        q += " AND (published_at IS NOT NULL AND published_at >= ?)"
-        params.append(start_date)
+        q += " AND a.published_ts >= ?"
+        params.append(to_epoch(start_date))
     if end_date:
-        q += " AND (published_at IS NOT NULL AND published_at <= ?)"
-        params.append(end_date)
-    q += " ORDER BY published_at DESC NULLS LAST, fetched_at DESC LIMIT ?"
-    params.append(limit)
-    c.execute(q, params)
-    rows = c.fetchall()
-    cols = ["id", "title", "url", "source", "published_at", "summary", "fetched_at"]
-    return [dict(zip(cols, r)) for r in rows]
-
-def export_articles(conn, out_path="export.csv", fmt="csv", **filters):
-    rows = query_articles(conn, **filters, limit=1000000)
-    if not rows:
+        q += " AND a.published_ts <= ?"
+        params.append(to_epoch(end_date))
+    q += " ORDER BY "
+    if use_fts:
+        q += "bm25(articles_fts, 10.0, 5.0, 1.0), "
+    q += "a.published_ts DESC NULLS LAST, a.fetched_ts DESC"
+    if limit is not None:
+        q += " LIMIT ?"
+        params.append(limit)
+    c = conn.cursor()
+    try:
+        c.execute(q, params)
+    except sqlite3.OperationalError as e:
+        if not use_fts:
+            raise
+        # not valid FTS5 syntax (e.g. "bbc.com"): search it as a quoted phrase
+        logging.debug("FTS query %r rejected (%s), retrying as phrase", keyword, e)
+        params[0] = '"' + keyword.replace('"', '""') + '"'
+        c.execute(q, params)
+    while True:
+        rows = c.fetchmany(chunk_size)
+        if not rows:
+            break
+        for r in rows:
+            yield dict(zip(ARTICLE_COLUMNS, r))
+
+def matching_sources(conn, pattern):
+    """Distinct source names containing pattern (case-insensitive), via index skip-scan."""
+    rows = conn.execute("""
+        WITH RECURSIVE s(name) AS (
+            SELECT MIN(source) FROM articles
+            UNION ALL
+            SELECT (SELECT MIN(source) FROM articles WHERE source > s.name) FROM s WHERE s.name IS NOT NULL
+        )
+        SELECT name FROM s WHERE name LIKE ?
+    """, (f"%{pattern}%",)).fetchall()
+    return [r[0] for r in rows]
+
+def query_articles(conn, source=None, keyword=None, start_date=None, end_date=None, limit=100, collapse=False):
+    return list(iter_articles(conn, source=source, keyword=keyword, start_date=start_date, end_date=end_date, limit=limit,
+                              collapse=collapse))
+
+def _progress(rows, every, out_path):
+    """Pass rows through, logging a running count every `every` rows."""
+    n = 0
+    for n, r in enumerate(rows, 1):
+        if every and n % every == 0:
+            logging.info("... %d rows written to %s", n, out_path)
+        yield r
+
+EXPORT_FORMATS = ["csv", "excel", "parquet", "arrow", "jsonl"]
+ROW_GROUP_SIZE = 50000
+
+def _chunks(rows, size):
+    it = iter(rows)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _arrow_schema():
+    import pyarrow as pa
+    ts = pa.timestamp("us", tz="UTC")
+    return pa.schema([
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("url", pa.string()),
+        ("source", pa.string()),
+        ("published_at", ts),
+        ("summary", pa.string()),
+        ("fetched_at", ts),
+    ])
+
+def _arrow_batch(chunk, schema):
+    import pyarrow as pa
+    cols = {k: [r[k] for r in chunk] for k in ARTICLE_COLUMNS}
+    for k in ("published_at", "fetched_at"):
+        cols[k] = [to_utc_datetime(v) for v in cols[k]]
+    return pa.RecordBatch.from_pydict(cols, schema=schema)
+
+def export_articles(conn, out_path="export.csv", fmt="csv", chunk_size=1000, progress_every=10000,
+                    row_group_size=ROW_GROUP_SIZE, compression=None, **filters):
+    """
+    Stream matching articles to out_path. fmt is one of EXPORT_FORMATS.
+    parquet/arrow write typed UTC timestamps in row groups of row_group_size;
+    compression: parquet snappy (default)/gzip/zstd/lz4/none, arrow lz4/zstd,
+    jsonl gzip.
+    """
+    if fmt in ("parquet", "arrow"):
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+            import pyarrow.parquet as pq
+        except ImportError:
+            logging.error("pyarrow required for %s export. Install pyarrow.", fmt)
+            return False
+    if fmt == "xlsx":
+        fmt = "excel"
+    if fmt == "excel":
+        try:
+            # write-only mode streams rows to disk
+            from openpyxl import Workbook
+        except ImportError:
+            logging.error("openpyxl required for Excel export. Install openpyxl.")
+            return False
+    if fmt not in EXPORT_FORMATS:
+        logging.error("Unsupported export format: %s", fmt)
+        return False
+    rows = iter_articles(conn, **filters, chunk_size=chunk_size)
+    first = next(rows, None)
+    if first is None:
         logging.warning("No articles match the filters. Nothing to export.")
         return False
+    rows = _progress(itertools.chain([first], rows), progress_every, out_path)
+    count = 0
     if fmt == "csv":
-        keys = ["id", "title", "url", "source", "published_at", "summary", "fetched_at"]
         with open(out_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
+            writer = csv.DictWriter(f, fieldnames=ARTICLE_COLUMNS)
             writer.writeheader()
             for r in rows:
                 writer.writerow(r)
-        logging.info("Exported %d rows to %s", len(rows), out_path)
-        return True
-    elif fmt in ("excel", "xlsx"):
-        if not PANDAS_AVAILABLE:
-            logging.error("pandas required for Excel export. Install pandas & openpyxl.")
+                count += 1
+    elif fmt == "excel":
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("articles")
+        ws.append(ARTICLE_COLUMNS)
+        for r in rows:
+            if count + 1 >= EXCEL_MAX_ROWS:
+                logging.warning("Excel sheet limit reached, export truncated at %d rows. Use CSV for larger exports.", count)
+                break
+            ws.append([r[k] for k in ARTICLE_COLUMNS])
+            count += 1
+        wb.save(out_path)
+    elif fmt == "jsonl":
+        if compression not in (None, "none", "gzip"):
+            logging.error("jsonl export supports gzip compression only")
             return False
-        df = pd.DataFrame(rows)
-        df.to_excel(out_path, index=False)
-        logging.info("Exported %d rows to %s", len(rows), out_path)
-        return True
-    else:
-        logging.error("Unsupported export format: %s", fmt)
-        return False
+        opener = gzip.open if compression == "gzip" else open
+        with opener(out_path, "wt", encoding="utf-8") as f:
+            for r in rows:
+                for k in ("published_at", "fetched_at"):
+                    dt = to_utc_datetime(r[k])
+                    r[k] = dt.isoformat() if dt else None
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                count += 1
+    elif fmt == "parquet":
+        schema = _arrow_schema()
+        with pq.ParquetWriter(out_path, schema, compression=compression or "snappy") as writer:
+            for chunk in _chunks(rows, row_group_size):
+                writer.write_table(pa.Table.from_batches([_arrow_batch(chunk, schema)]), row_group_size=row_group_size)
+                count += len(chunk)
+    elif fmt == "arrow":
+        schema = _arrow_schema()
+        codec = None if compression in (None, "none") else compression
+        options = pa.ipc.IpcWriteOptions(compression=codec)
+        with pa.OSFile(out_path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+            for chunk in _chunks(rows, row_group_size):
+                writer.write_batch(_arrow_batch(chunk, schema))
+                count += len(chunk)
+    logging.info("Exported %d rows to %s", count, out_path)
+    return True
 
 # === Dedup utility ===
-def dedupe_db(conn):
+DEDUPE_BATCH_SIZE = 5000
+
+def dedupe_db(conn, dry_run=False, batch_size=DEDUPE_BATCH_SIZE):
     """
-    Remove duplicate rows by same URL or same title, keep earliest id.
+    Remove rows repeating an earlier row's URL (rule "url"), then title
+    (rule "title"), keeping the lowest id. Dedup keys are the stored
+    url_hash/title_hash, computed on the fly for rows that lack them.
+    Duplicates are ranked once with ROW_NUMBER() into a temp table and deleted
+    in batches, committing between batches so readers are not blocked for the
+    whole run. Returns {"url": n, "title": n}.
     """
+    conn.create_function("news_url_hash", 1, url_hash, deterministic=True)
+    conn.create_function("news_title_hash", 1, title_hash, deterministic=True)
     c = conn.cursor()
-    # remove duplicates by url (keep min id)
+    c.execute("DROP TABLE IF EXISTS temp.dedupe_victims")
+    c.execute("CREATE TEMP TABLE dedupe_victims (id INTEGER PRIMARY KEY, rule TEXT)")
     c.execute("""
-        DELETE FROM articles WHERE id NOT IN (
-            SELECT MIN(id) FROM articles GROUP BY url HAVING url IS NOT NULL
-        ) AND url IS NOT NULL;
+        INSERT INTO temp.dedupe_victims (id, rule)
+        SELECT id, 'url' FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY k ORDER BY id) AS rn
+            FROM (SELECT id, COALESCE(url_hash, news_url_hash(url)) AS k FROM articles WHERE url IS NOT NULL AND url != '')
+        ) WHERE rn > 1
     """)
-    # remove duplicates by title if url is null or multiple with different URLs
     c.execute("""
-        DELETE FROM articles WHERE id NOT IN (
-            SELECT MIN(id) FROM articles GROUP BY title HAVING title IS NOT NULL
-        ) AND title IS NOT NULL;
+        INSERT INTO temp.dedupe_victims (id, rule)
+        SELECT id, 'title' FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY k ORDER BY id) AS rn
+            FROM (
+                SELECT id, COALESCE(title_hash, news_title_hash(title)) AS k FROM articles
+                WHERE title IS NOT NULL AND title != '' AND id NOT IN (SELECT id FROM temp.dedupe_victims)
+            )
+        ) WHERE rn > 1
     """)
+    counts = dict.fromkeys(("url", "title"), 0)
+    counts.update(c.execute("SELECT rule, COUNT(*) FROM temp.dedupe_victims GROUP BY rule").fetchall())
     conn.commit()
-    logging.info("Deduplication complete.")
+    if dry_run:
+        c.execute("DROP TABLE temp.dedupe_victims")
+        logging.info("Dry run: would remove %d rows by URL and %d by title.", counts["url"], counts["title"])
+        return counts
+
+    last_id = 0
+    while True:
+        ids = [r[0] for r in c.execute(
+            "SELECT id FROM temp.dedupe_victims WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+        ).fetchall()]
+        if not ids:
+            break
+        with conn:
+            c.execute("DELETE FROM articles WHERE id IN (%s)" % ",".join("?" * len(ids)), ids)
+        last_id = ids[-1]
+    c.execute("DROP TABLE temp.dedupe_victims")
+    # survivors that were stored without keys (pre-UNIQUE rows) can now own them
+    with conn:
+        c.execute("UPDATE OR IGNORE articles SET url_hash = news_url_hash(url) WHERE url_hash IS NULL AND url IS NOT NULL")
+        c.execute("UPDATE OR IGNORE articles SET title_hash = news_title_hash(title) WHERE title_hash IS NULL AND title IS NOT NULL")
+    logging.info("Deduplication complete: removed %d rows by URL, %d by title.", counts["url"], counts["title"])
+    return counts
+
+# Synthetic data generator (for benchmarking view/export/dedupe at scale)
+SYNTH_WORDS = (
+    "election government minister economy market stocks climate storm flood wildfire court trial police "
+    "health vaccine hospital school university football cup final match player coach film music award "
+    "space rocket launch science study energy oil gas prices inflation bank rates trade tariff war peace "
+    "talks summit leader president protest strike union company profit jobs tech ai chip phone data"
+).split()
+
+def generate_articles(conn, count, sources=50, skew=1.1, dup_rate=0.05, days=365, dist="recent",
+                      null_dates=0.1, batch_size=50000, seed=None):
+    """
+    Append `count` synthetic articles. Source frequencies follow a Zipf law
+    (exponent `skew`), published_at is uniform over the last `days` days or
+    exponentially biased to recent ones, a `null_dates` fraction has no date
+    (like scraped rows) and a `dup_rate` fraction repeats an earlier URL or
+    title. Duplicates are stored without dedup keys, like rows predating the
+    UNIQUE indexes, so `dedupe` has work to do.
+    """
+    rng = random.Random(seed)
+    names = [f"Source {i:03d}" for i in range(sources)]
+    weights = [1 / (i + 1) ** skew for i in range(sources)]
+    now = time.time()
+    fetched_at = datetime.utcnow().isoformat()
+    start_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+    recent = []
+    written = 0
+    c = conn.cursor()
+    while written < count:
+        n = min(batch_size, count - written)
+        batch = []
+        srcs = rng.choices(names, weights, k=n)
+        for i in range(n):
+            serial = start_id + written + i
+            if dist == "uniform":
+                age = rng.uniform(0, days)
+            else:
+                age = min(rng.expovariate(5 / days), days)
+            pub = None if rng.random() < null_dates else datetime.fromtimestamp(now - age * 86400, timezone.utc)
+            article = {
+                "title": " ".join(rng.choices(SYNTH_WORDS, k=rng.randint(5, 10))).capitalize() + f" ({serial})",
+                "url": f"https://www.source{srcs[i].split()[-1]}.example.com/news/{serial}",
+                "source": srcs[i],
+                "published_at": pub.isoformat() if pub else None,
+                "summary": " ".join(rng.choices(SYNTH_WORDS, k=rng.randint(15, 30))),
+            }
+            dup = recent and rng.random() < dup_rate
+            if dup:
+                other = rng.choice(recent)
+                if rng.random() < 0.5:
+                    article["url"] = other["url"]
+                else:
+                    article["title"] = other["title"]
+            elif len(recent) < 10000:
+                recent.append(article)
+            else:
+                recent[rng.randrange(len(recent))] = article
+            row = list(_article_row(article, fetched_at))
+            if dup:
+                row[6] = row[7] = None   # url_hash, title_hash
+            batch.append(row)
+        with conn:
+            max_id = c.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+            c.executemany(INSERT_SQL, batch)
+            index_near_duplicates(conn, after_id=max_id)
+        written += n
+        logging.info("Generated %d / %d articles", written, count)
+    return written
+
+# Benchmarks
+STARTUP_BUDGET_MS = 150
+# committed synthetic page, feeds and NewsAPI response (not recordings of
+# the real sites); `bench record` writes live ones to ./fixtures instead
+BENCH_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures")
+
+def _bench_sources(fixtures):
+    """
+    Registry sources plus those defined in <fixtures>/sources.json, whose
+    "fixture" key names the saved file (default <source>.html / .xml).
+    """
+    sources = dict(SOURCES)
+    path = os.path.join(fixtures, "sources.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            sources.update((key, _with_defaults(cfg)) for key, cfg in json.load(f).items())
+    return sources
+
+def _fixture_path(fixtures, key, cfg):
+    kind = "xml" if cfg.get("type") == "feed" else "html"
+    return os.path.join(fixtures, cfg.get("fixture", f"{key}.{kind}"))
+HEAVY_MODULES = ("requests", "bs4", "dateutil", "asyncio", "openpyxl", "pyarrow", "pandas")
+
+def _median_ms(cmd, runs, cwd):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, capture_output=True, check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+def bench_startup(runs=7, budget_ms=STARTUP_BUDGET_MS, command=("view", "--limit", "1")):
+    """
+    Time cold starts of the CLI in a scratch directory against a bare
+    interpreter, and check which heavy modules the command imports.
+    """
+    script = os.path.abspath(__file__)
+    cmd = [sys.executable, script, *command]
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(cmd, cwd=tmp, capture_output=True, check=True)  # create the DB once
+        bare_ms = _median_ms([sys.executable, "-c", "pass"], runs, tmp)
+        cli_ms = _median_ms(cmd, runs, tmp)
+        r = subprocess.run([sys.executable, "-X", "importtime", *cmd[1:]], cwd=tmp, capture_output=True, text=True)
+    imported = {line.rsplit("|", 1)[-1].strip() for line in r.stderr.splitlines() if line.startswith("import time:")}
+    heavy = [m for m in HEAVY_MODULES if m in imported]
+    overhead = cli_ms - bare_ms
+    result = {
+        "command": " ".join(command),
+        "runs": runs,
+        "interpreter_ms": round(bare_ms, 1),
+        "median_ms": round(cli_ms, 1),
+        "overhead_ms": round(overhead, 1),
+        "budget_ms": budget_ms,
+        "heavy_imports": heavy,
+        "ok": overhead <= budget_ms and not heavy,
+    }
+    print(f"{result['command']}: {cli_ms:.1f} ms median ({overhead:.1f} ms over bare interpreter, budget {budget_ms:.0f} ms)")
+    if heavy:
+        print("  heavy modules imported: " + ", ".join(heavy))
+    print("  OK" if result["ok"] else "  FAIL: startup regressed")
+    return result
+
+def _available_backends():
+    found = []
+    for backend, module in (("selectolax", "selectolax.lexbor"), ("lxml", "lxml")):
+        try:
+            importlib.import_module(module)
+            found.append(backend)
+        except ImportError:
+            pass
+    return found + ["html.parser"]
+
+def bench_parse(fixtures=BENCH_FIXTURES, repeat=20, limit=50):
+    """
+    Parse saved front pages (<fixtures>/<source>.html) with every available
+    backend, with and without SoupStrainer, and report the speedup over the
+    original full html.parser parse.
+    """
+    variants = [("html.parser", False)]
+    for backend in _available_backends():
+        if backend == "selectolax":
+            variants.append((backend, False))
+        else:
+            variants.append((backend, True))
+            if backend != "html.parser":
+                variants.append((backend, False))
+    result = {"fixtures": fixtures, "repeat": repeat, "sources": {}}
+    for key, cfg in _bench_sources(fixtures).items():
+        if cfg.get("type") == "feed":
+            continue
+        path = _fixture_path(fixtures, key, cfg)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        rows = {}
+        for backend, strain in variants:
+            parse_source(cfg, html, limit, backend, strain)  # warm up imports/selector cache
+            started = time.perf_counter()
+            for _ in range(repeat):
+                items = parse_source(cfg, html, limit, backend, strain)
+            ms = (time.perf_counter() - started) * 1000 / repeat
+            rows[backend + ("+strainer" if strain else "")] = {"ms": round(ms, 3), "items": len(items)}
+        base = rows["html.parser"]["ms"]
+        print(f"{key} ({len(html) / 1024:.0f} KiB)")
+        for name, row in rows.items():
+            row["speedup"] = round(base / row["ms"], 2) if row["ms"] else None
+            print(f"  {name:<22} {row['ms']:>9.2f} ms  x{row['speedup']:<6} {row['items']} items")
+        result["sources"][key] = rows
+    if not result["sources"]:
+        print(f"No fixtures found in {fixtures} (expected <source>.html files)")
+    return result
+
+def _git_revision():
+    try:
+        r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                           capture_output=True, text=True, timeout=5)
+        return r.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _db_bytes(conn):
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def record_fixtures(fixtures="fixtures", api_key=None):
+    """Save live front pages and feeds (and one NewsAPI response) for offline benchmarks."""
+    os.makedirs(fixtures, exist_ok=True)
+    session = make_session()
+    for key, cfg in SOURCES.items():
+        try:
+            r = session.get(cfg["url"], timeout=15)
+            r.raise_for_status()
+        except Exception as e:
+            logging.error("Could not record %s: %s", key, e)
+            continue
+        with open(os.path.join(fixtures, f"{key}.{'xml' if is_feed(key) else 'html'}"), "wb") as f:
+            f.write(r.content)
+        logging.info("Recorded %s (%d bytes)", key, len(r.content))
+    if api_key:
+        try:
+            r = request_with_retry(session, NEWSAPI_URL, params={"pageSize": 100, "language": "en"},
+                                   headers={"Authorization": api_key}, timeout=15)
+            with open(os.path.join(fixtures, "newsapi.json"), "wb") as f:
+                f.write(r.content)
+        except NewsAPIError as e:
+            logging.error("Could not record NewsAPI: %s", e)
+    session.close()
+    return {"fixtures": fixtures, "ok": True}
+
+def _scaled(articles, scale):
+    """Repeat fixture articles `scale` times with unique URLs/titles."""
+    for i in range(scale):
+        for a in articles:
+            # a path segment, not a query parameter: that would be appended to
+            # an existing query and could be stripped as a tracking parameter
+            parts = urlsplit(a["url"])
+            url = urlunsplit(parts._replace(path=f"{parts.path.rstrip('/')}/r{i}"))
+            yield {**a, "url": url, "title": f"{a['title']} #{i}"}
+
+def bench_fixtures(fixtures=BENCH_FIXTURES, repeat=5, scale=100):
+    """
+    Replay recorded pages (<source>.html), feeds (<source>.xml) and NewsAPI
+    responses (newsapi*.json) without network: parse time per source, NewsAPI
+    mapping time, articles/sec through insert_articles (new rows, then
+    all-duplicate re-insert) and DB size growth. Returns a dict suitable for comparing across commits.
+    """
+    result = {
+        "revision": _git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "parser": resolve_backend(PARSER_BACKEND),
+        "parse": {},
+        "ingest": {},
+    }
+    articles = []
+    for key, cfg in _bench_sources(fixtures).items():
+        path = _fixture_path(fixtures, key, cfg)
+        if not os.path.exists(path):
+            continue
+        if cfg.get("type") == "feed":
+            with open(path, "rb") as f:
+                raw = f.read()
+            parse = lambda: parse_feed(cfg, [raw[i:i + FEED_CHUNK_SIZE] for i in range(0, len(raw), FEED_CHUNK_SIZE)], limit=1000)[0]
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                raw = f.read()
+            parse = functools.partial(parse_source, cfg, raw, 1000)
+        items = parse()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            parse()
+        ms = (time.perf_counter() - started) * 1000 / repeat
+        result["parse"][key] = {"bytes": len(raw), "ms": round(ms, 3), "items": len(items)}
+        articles += items
+    for name in sorted(os.listdir(fixtures)) if os.path.isdir(fixtures) else []:
+        if name.startswith("newsapi") and name.endswith(".json"):
+            with open(os.path.join(fixtures, name), encoding="utf-8") as f:
+                raw = f.read()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                items = [newsapi_article(a) for a in json.loads(raw).get("articles", [])]
+            ms = (time.perf_counter() - started) * 1000 / repeat
+            result["parse"][name] = {"bytes": len(raw), "ms": round(ms, 3), "items": len(items)}
+            articles += items
+    articles = [a for a in articles if a.get("title") and a.get("url")]
+    if not articles:
+        print(f"No fixtures found in {fixtures} (run `bench record` first)")
+        result["ok"] = False
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        init_db(conn)
+        size_before = _db_bytes(conn)
+        rows = list(_scaled(articles, scale))
+        for phase in ("insert", "duplicates"):
+            started = time.perf_counter()
+            stats = insert_articles(conn, rows)
+            secs = time.perf_counter() - started
+            result["ingest"][phase] = {
+                "articles": len(rows),
+                "inserted": sum(b["inserted"] for b in stats),
+                "seconds": round(secs, 4),
+                "articles_per_sec": round(len(rows) / secs, 1) if secs else None,
+            }
+        size_after = _db_bytes(conn)
+        conn.close()
+    inserted = result["ingest"]["insert"]["inserted"]
+    result["db"] = {
+        "bytes_before": size_before,
+        "bytes_after": size_after,
+        "bytes_per_article": round((size_after - size_before) / inserted, 1) if inserted else None,
+    }
+
+    for key, row in result["parse"].items():
+        print(f"parse  {key:<20} {row['ms']:>9.2f} ms  {row['items']} items  ({row['bytes'] / 1024:.0f} KiB)")
+    for phase, row in result["ingest"].items():
+        print(f"ingest {phase:<20} {row['articles_per_sec']:>9} articles/s  ({row['articles']} articles, {row['inserted']} new)")
+    print(f"db     growth {(size_after - size_before) / 1024:.0f} KiB, {result['db']['bytes_per_article']} bytes/article")
+    result["ok"] = True
+    return result
+
+def compare_results(current, baseline_path):
+    """Print relative change of every numeric metric against a previous --json result."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def walk(cur, base, prefix=""):
+        for k, v in cur.items():
+            b = base.get(k) if isinstance(base, dict) else None
+            if isinstance(v, dict):
+                walk(v, b, f"{prefix}{k}.")
+            elif isinstance(v, (int, float)) and not isinstance(v, bool) and isinstance(b, (int, float)) and b:
+                print(f"  {prefix + k:<40} {b:>12} -> {v:<12} {(v - b) / b * 100:+.1f}%")
+    print(f"Compared with {baseline_path} (revision {baseline.get('revision')}):")
+    walk(current, baseline)
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"p50": round(pick(0.5), 2), "p90": round(pick(0.9), 2), "p99": round(pick(0.99), 2), "max": round(ordered[-1], 2)}
+
+def bench_query(db_path, runs=5, limit=50):
+    """
+    Time view (query_articles with a limit) and export (streaming CSV) for
+    every combination of the source/keyword/date filters, plus dedupe on a
+    copy of the database, and report latency percentiles in milliseconds.
+    """
+    conn = sqlite3.connect(db_path)
+    init_db(conn)
+    total = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    top = conn.execute("SELECT source FROM articles GROUP BY source ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    newest = conn.execute("SELECT MAX(published_ts) FROM articles").fetchone()[0] or int(time.time())
+    values = {
+        "source": top[0] if top else None,
+        "keyword": "election",
+        "start_date": datetime.fromtimestamp(newest - 30 * 86400, timezone.utc).isoformat(),
+        "end_date": datetime.fromtimestamp(newest, timezone.utc).isoformat(),
+    }
+    combos = [()]
+    for n in (1, 2, 3):
+        combos += list(itertools.combinations(("source", "keyword", "dates"), n))
+    result = {"db": db_path, "rows": total, "runs": runs, "filters": values, "timings": {}}
+    print(f"{db_path}: {total} articles, {runs} runs per case")
+    logging.disable(logging.INFO)  # keep per-run export/dedupe logs out of the report
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "export.csv")
+        for combo in combos:
+            filters = {}
+            for name in combo:
+                if name == "dates":
+                    filters["start_date"], filters["end_date"] = values["start_date"], values["end_date"]
+                else:
+                    filters[name] = values[name]
+            label = "+".join(combo) or "none"
+            for op in ("view", "export"):
+                samples = []
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    if op == "view":
+                        query_articles(conn, limit=limit, **filters)
+                    else:
+                        export_articles(conn, out_path=out, progress_every=0, **filters)
+                    samples.append((time.perf_counter() - started) * 1000)
+                stats = _percentiles(samples)
+                result["timings"][f"{op}:{label}"] = stats
+                print(f"  {op:<7} {label:<24} p50 {stats['p50']:>10.2f} ms  p90 {stats['p90']:>10.2f} ms  p99 {stats['p99']:>10.2f} ms")
+        samples = []
+        for _ in range(runs):
+            copy = sqlite3.connect(os.path.join(tmp, "dedupe.db"))
+            conn.backup(copy)
+            started = time.perf_counter()
+            dedupe_db(copy)
+            samples.append((time.perf_counter() - started) * 1000)
+            copy.close()
+            os.remove(os.path.join(tmp, "dedupe.db"))
+        stats = _percentiles(samples)
+        result["timings"]["dedupe"] = stats
+        print(f"  dedupe  {'':<24} p50 {stats['p50']:>10.2f} ms  p90 {stats['p90']:>10.2f} ms  p99 {stats['p99']:>10.2f} ms")
+    logging.disable(logging.NOTSET)
+    conn.close()
+    result["ok"] = True
+    return result
+
+def bench_storage(profiles=None, count=20000, commit_every=100, readers=4, seconds=5.0):
+    """
+    Per storage profile: ingest `count` synthetic articles in commits of
+    `commit_every` (like repeated fetch cycles), then keep ingesting while
+    `readers` threads run view queries on their own connections, and report
+    write and read throughput plus read latency and lock errors.
+    """
+    profiles = profiles or list(STORAGE_PROFILES)
+    source = sqlite3.connect(":memory:")
+    init_db(source)
+    logging.disable(logging.INFO)
+    generate_articles(source, count * 2, dup_rate=0, seed=1)
+    source.row_factory = sqlite3.Row
+    pool = [dict(r) for r in source.execute("SELECT title, url, source, published_at, summary FROM articles")]
+    source.close()
+    result = {"count": count, "commit_every": commit_every, "readers": readers, "seconds": seconds, "profiles": {}}
+    print(f"{count} articles in commits of {commit_every}; {readers} readers for {seconds:.0f}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in profiles:
+            path = os.path.join(tmp, f"{name}.db")
+            conn = sqlite3.connect(path, check_same_thread=False)
+            init_db(conn, profile=name)
+            started = time.perf_counter()
+            for i in range(0, count, commit_every):
+                insert_articles(conn, pool[i:i + commit_every])
+            ingest_secs = time.perf_counter() - started
+
+            stop = threading.Event()
+            latencies = []
+            errors = []
+            written = [0]
+
+            def writer():
+                i = count
+                while not stop.is_set() and i < len(pool):
+                    try:
+                        insert_articles(conn, pool[i:i + commit_every])
+                        written[0] += min(commit_every, len(pool) - i)
+                    except sqlite3.OperationalError:
+                        errors.append("write")
+                    i += commit_every
+
+            def reader(seed):
+                rconn = sqlite3.connect(path, timeout=5)
+                apply_profile(rconn, name)
+                rng = random.Random(seed)
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    try:
+                        query_articles(rconn, keyword=rng.choice(SYNTH_WORDS), limit=50)
+                        latencies.append((time.perf_counter() - t0) * 1000)
+                    except sqlite3.OperationalError:
+                        errors.append("read")
+                rconn.close()
+
+            threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            time.sleep(seconds)
+            stop.set()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+            conn.close()
+            stats = {
+                "ingest_articles_per_sec": round(count / ingest_secs, 1),
+                "concurrent_writes_per_sec": round(written[0] / elapsed, 1),
+                "reads_per_sec": round(len(latencies) / elapsed, 1),
+                "read_ms": _percentiles(latencies) if latencies else None,
+                "lock_errors": len(errors),
+            }
+            result["profiles"][name] = stats
+            p50 = stats["read_ms"]["p50"] if latencies else float("nan")
+            print(f"  {name:<8} ingest {stats['ingest_articles_per_sec']:>9.1f}/s  concurrent: writes "
+                  f"{stats['concurrent_writes_per_sec']:>8.1f}/s  reads {stats['reads_per_sec']:>7.1f}/s "
+                  f"(p50 {p50:.2f} ms)  lock errors {stats['lock_errors']}")
+    logging.disable(logging.NOTSET)
+    result["ok"] = True
+    return result
+
+def run_bench(args):
+    """Dispatch `bench` subcommands; returns False if a benchmark failed its budget."""
+    if args.bench == "startup":
+        result = bench_startup(runs=args.runs, budget_ms=args.budget_ms)
+    elif args.bench == "parse":
+        result = bench_parse(fixtures=args.fixtures, repeat=args.repeat)
+    elif args.bench == "record":
+        result = record_fixtures(fixtures=args.fixtures, api_key=args.newsapi_key)
+    elif args.bench == "fixtures":
+        result = bench_fixtures(fixtures=args.fixtures, repeat=args.repeat, scale=args.scale)
+    elif args.bench == "query":
+        result = bench_query(DB_PATH, runs=args.runs)
+    elif args.bench == "storage":
+        result = bench_storage(profiles=args.profiles, count=args.count, commit_every=args.commit_every,
+                               readers=args.readers, seconds=args.seconds)
+    if args.compare:
+        compare_results(result, args.compare)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1)
+    return result.get("ok", True)
 
 # Helpers 
+def to_utc_datetime(s):
+    """Parse a stored timestamp string into an aware UTC datetime (None if unparseable)."""
+    if not s:
+        return None
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        from dateutil import parser as dateparser
+        try:
+            dt = dateparser.parse(s)
+        except (ValueError, OverflowError):
+            return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def to_epoch(value):
+    """UTC epoch seconds for a timestamp string or datetime (None if unparseable)."""
+    if isinstance(value, datetime):
+        dt = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    else:
+        dt = to_utc_datetime(value)
+    return int(dt.timestamp()) if dt else None
+
+def end_of_day(s):
+    """Make a date-only bound ("2024-01-31") inclusive of that whole day."""
+    if s and len(s) == 10 and s[4] == "-" and s[7] == "-":
+        return s + "T23:59:59"
+    return s
+
 def parse_date(s):
     if not s:
         return None
     try:
+        return datetime.fromisoformat(s).isoformat()
+    except ValueError:
+        pass
+    try:
+        from dateutil import parser as dateparser
         dt = dateparser.parse(s)
         
         return dt.isoformat()
@@ -238,91 +2849,246 @@ def parse_date(s):
 
 #CLI main
 def main():
+    global DB_PATH, PARSER_BACKEND, STORAGE_PROFILE, PARSE_WORKERS, PARSE_QUEUE_SIZE
     parser = argparse.ArgumentParser(description="News Aggregator CLI")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path (or set NEWS_DB)")
+    parser.add_argument("--profile", choices=list(STORAGE_PROFILES), default=STORAGE_PROFILE,
+                        help="SQLite storage profile (or set NEWS_DB_PROFILE)")
+    parser.add_argument("--sources-file", default=os.getenv("NEWS_SOURCES_FILE"), help="JSON file with extra scraping sources")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
+    # options shared by fetch and serve
+    fetch_opts = argparse.ArgumentParser(add_help=False)
+    fetch_opts.add_argument("--source", default="all", help="'all', registered source keys (see list-sources) and/or NewsAPI sources, comma separated")
+    fetch_opts.add_argument("--keyword", default=None, help="keyword for NewsAPI q")
+    fetch_opts.add_argument("--query", action="append", default=None, metavar="TEXT[:PRIORITY]", help="extra NewsAPI query (repeatable); higher priority wins when quota is low")
+    fetch_opts.add_argument("--daily-quota", type=int, default=NEWSAPI_DAILY_QUOTA, help="NewsAPI requests allowed per UTC day")
+    fetch_opts.add_argument("--rate", type=float, default=NEWSAPI_RATE, help="max NewsAPI requests per second")
+    fetch_opts.add_argument("--limit", type=int, default=50, help="max items to fetch per source")
+    fetch_opts.add_argument("--pages", type=int, default=1, help="pages for NewsAPI pagination")
+    fetch_opts.add_argument("--update-existing", action="store_true", help="refresh summary/published_at of stored URLs when a newer copy arrives")
+    fetch_opts.add_argument("--deadline", type=float, default=FETCH_DEADLINE, help="seconds to wait for all sources")
+    fetch_opts.add_argument("--host-concurrency", type=int, default=HOST_CONCURRENCY, help="max parallel requests per host")
+    fetch_opts.add_argument("--no-cache", action="store_true", help="ignore ETag/Last-Modified validators and always download pages")
+    fetch_opts.add_argument("--newsapi-endpoint", choices=NEWSAPI_ENDPOINTS, default="top-headlines", help="'everything' supports from= for incremental polling")
+    fetch_opts.add_argument("--full", action="store_true", help="ignore the NewsAPI cursor and feed GUIDs and fetch everything")
+    fetch_opts.add_argument("--enrich", action="store_true", help="fetch new articles' pages for publish time and description")
+    fetch_opts.add_argument("--enrich-concurrency", type=int, default=ENRICH_HOST_CONCURRENCY, help="max parallel article page requests per host")
+    fetch_opts.add_argument("--no-bloom", action="store_true", help="do not prefilter stored articles with the in-memory Bloom filter")
+    fetch_opts.add_argument("--bloom-fp-rate", type=float, default=SEEN_FP_RATE, help="target false-positive rate (share of new articles wrongly skipped)")
+    fetch_opts.add_argument("--bloom-memory", type=float, default=SEEN_MEMORY_MB, help="max Bloom filter size in MB")
+    fetch_opts.add_argument("--bloom-verify", action="store_true", help="confirm Bloom hits against the DB (exact, but slower)")
+    fetch_opts.add_argument("--write-batch", type=int, default=WRITE_BATCH_SIZE, help="articles per commit of the writer thread")
+    fetch_opts.add_argument("--write-delay", type=float, default=WRITE_MAX_DELAY, help="max seconds an article waits before being committed")
+    fetch_opts.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="parser processes (0 = parse in fetch threads; or set NEWS_PARSE_WORKERS)")
+    fetch_opts.add_argument("--parse-queue", type=int, default=0, help="max downloaded pages waiting for a parser (default: 2 per worker)")
+    fetch_opts.add_argument("--parser", choices=PARSER_BACKENDS, default=None, help="HTML parser backend (default: NEWS_PARSER env or auto)")
+    fetch_opts.add_argument("--newsapi-key", default=os.getenv("NEWSAPI_KEY"), help="NewsAPI key (or set NEWSAPI_KEY)")
+
     # fetch
-    pfetch = sub.add_parser("fetch", help="Fetch news and store in DB")
-    pfetch.add_argument("--source", default="all", help="newsapi source or 'bbc','cnn','all'")
-    pfetch.add_argument("--keyword", default=None, help="keyword for NewsAPI q")
-    pfetch.add_argument("--limit", type=int, default=50, help="max items to fetch per source")
-    pfetch.add_argument("--pages", type=int, default=1, help="pages for NewsAPI pagination")
-    pfetch.add_argument("--newsapi-key", default=os.getenv("NEWSAPI_KEY"), help="NewsAPI key (or set NEWSAPI_KEY)")
+    pfetch = sub.add_parser("fetch", parents=[fetch_opts], help="Fetch news and store in DB")
+
+    # serve
+    pserve = sub.add_parser("serve", parents=[fetch_opts], help="Run as a daemon polling each source on its own interval")
+    pserve.add_argument("--interval", type=float, default=None, help="override the polling interval (seconds) of scraping sources")
+    pserve.add_argument("--newsapi-interval", type=float, default=NEWSAPI_INTERVAL, help="NewsAPI polling interval (seconds)")
+    pserve.add_argument("--jitter", type=float, default=0.1, help="random +/- fraction applied to every interval")
+
+    pstatus = sub.add_parser("status", help="Show the schedule state of a running `serve` process")
 
     # view
     pview = sub.add_parser("view", help="View stored articles")
     pview.add_argument("--source", default=None)
-    pview.add_argument("--keyword", default=None)
+    pview.add_argument("--keyword", default=None, help='full-text query: words, "phrase", prefix*, AND/OR/NOT')
     pview.add_argument("--start", default=None, help="start date (YYYY-MM-DD or ISO)")
     pview.add_argument("--end", default=None, help="end date (YYYY-MM-DD or ISO)")
     pview.add_argument("--limit", type=int, default=50)
+    pview.add_argument("--collapse", action="store_true", help="show one article per near-duplicate cluster")
 
     # export
     pexport = sub.add_parser("export", help="Export stored articles")
-    pexport.add_argument("--format", choices=["csv", "excel"], default="csv")
+    pexport.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
     pexport.add_argument("--out", default="export.csv")
+    pexport.add_argument("--chunk-size", type=int, default=1000, help="rows fetched from the DB per chunk")
+    pexport.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE, help="rows per Parquet row group / Arrow batch")
+    pexport.add_argument("--compression", default=None, help="parquet: snappy|gzip|zstd|lz4|none, arrow: lz4|zstd, jsonl: gzip")
     pexport.add_argument("--source", default=None)
     pexport.add_argument("--keyword", default=None)
     pexport.add_argument("--start", default=None)
     pexport.add_argument("--end", default=None)
+    pexport.add_argument("--collapse", action="store_true", help="export one article per near-duplicate cluster")
 
     
     pdup = sub.add_parser("dedupe", help="Run DB deduplication")
+    pdup.add_argument("--dry-run", action="store_true", help="only report how many rows each rule would remove")
+    pdup.add_argument("--batch-size", type=int, default=DEDUPE_BATCH_SIZE, help="rows deleted per transaction")
+
+    pcluster = sub.add_parser("cluster", help="Build the near-duplicate index for articles stored before it existed")
+    pcluster.add_argument("--rebuild", action="store_true", help="index every article again, not only those missing")
+
+    penrich = sub.add_parser("enrich", help="Fill missing summaries/publish times from article pages (cached)")
+    penrich.add_argument("--limit", type=int, default=200, help="max articles to enrich, newest first")
+    penrich.add_argument("--host-concurrency", type=int, default=ENRICH_HOST_CONCURRENCY, help="max parallel requests per host")
+
+    preindex = sub.add_parser("reindex", help="Rebuild the full-text search index (backfills existing articles)")
 
     # list sources
-    psource = sub.add_parser("list-sources", help="List built-in scraping sources")
+    psource = sub.add_parser("list-sources", help="List built-in scraping and feed sources")
+
+    # benchmarks
+    pbench = sub.add_parser("bench", help="Run performance benchmarks")
+    bench_sub = pbench.add_subparsers(dest="bench", required=True)
+    bench_opts = argparse.ArgumentParser(add_help=False)
+    bench_opts.add_argument("--json", dest="json_out", default=None, help="also write results to this JSON file")
+    bench_opts.add_argument("--compare", default=None, help="previous --json result to diff against")
+    pbs = bench_sub.add_parser("startup", parents=[bench_opts], help="Cold-start time of `view`; fails past the budget")
+    pbs.add_argument("--runs", type=int, default=7)
+    pbs.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="max median startup over a bare interpreter")
+    pbp = bench_sub.add_parser("parse", parents=[bench_opts], help="Parser backend speed on saved front pages")
+    pbp.add_argument("--fixtures", default=BENCH_FIXTURES, help="directory with <source>.html files (default: the committed ones)")
+    pbp.add_argument("--repeat", type=int, default=20)
+    pbr = bench_sub.add_parser("record", parents=[bench_opts], help="Save live front pages / NewsAPI responses as fixtures")
+    pbr.add_argument("--fixtures", default="fixtures", help="output directory (not the committed fixtures)")
+    pbr.add_argument("--newsapi-key", default=os.getenv("NEWSAPI_KEY"))
+    pbf = bench_sub.add_parser("fixtures", parents=[bench_opts], help="Offline parse + ingest benchmark on recorded fixtures")
+    pbf.add_argument("--fixtures", default=BENCH_FIXTURES, help="directory with recorded fixtures (default: the committed ones)")
+    pbf.add_argument("--repeat", type=int, default=5)
+    pbf.add_argument("--scale", type=int, default=100, help="replay fixture articles this many times for ingest")
+
+    pbq = bench_sub.add_parser("query", parents=[bench_opts], help="Latency percentiles of view/export filters and dedupe on --db")
+    pbq.add_argument("--runs", type=int, default=5)
+    pbst = bench_sub.add_parser("storage", parents=[bench_opts], help="Ingest and concurrent-read throughput per storage profile")
+    pbst.add_argument("--profiles", nargs="+", choices=list(STORAGE_PROFILES), default=None)
+    pbst.add_argument("--count", type=int, default=20000, help="articles ingested per profile")
+    pbst.add_argument("--commit-every", type=int, default=100, help="articles per commit")
+    pbst.add_argument("--readers", type=int, default=4, help="concurrent reader threads")
+    pbst.add_argument("--seconds", type=float, default=5.0, help="duration of the concurrent phase")
+
+    # synthetic data
+    pgen = sub.add_parser("generate", help="Fill the DB with synthetic articles for benchmarking")
+    pgen.add_argument("--count", type=int, default=100000)
+    pgen.add_argument("--sources", type=int, default=50, help="number of distinct sources")
+    pgen.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of source frequencies")
+    pgen.add_argument("--dup-rate", type=float, default=0.05, help="fraction of rows repeating an earlier URL or title")
+    pgen.add_argument("--days", type=int, default=365, help="span of published dates")
+    pgen.add_argument("--dist", choices=["recent", "uniform"], default="recent", help="date distribution")
+    pgen.add_argument("--null-dates", type=float, default=0.1, help="fraction of rows without published_at")
+    pgen.add_argument("--seed", type=int, default=None)
 
     # clear DB
     pclear = sub.add_parser("clear", help="Clear all articles (use with caution)")
 
     args = parser.parse_args()
 
+    DB_PATH = args.db
+    STORAGE_PROFILE = args.profile
+    if args.sources_file:
+        load_sources(args.sources_file)
+    if getattr(args, "parser", None):
+        PARSER_BACKEND = args.parser
+    if hasattr(args, "parse_workers"):
+        PARSE_WORKERS, PARSE_QUEUE_SIZE = args.parse_workers, args.parse_queue
+
+    # commands that do not touch the database
+    if args.cmd == "status":
+        print_schedule()
+        return
+
+    if args.cmd == "list-sources":
+        print("Sources:")
+        for key, cfg in SOURCES.items():
+            print(f"  {key:<12} {cfg['name']:<20} {cfg.get('type', 'page'):<5} {cfg['url']}  (min interval {cfg.get('min_interval', 0)}s)")
+        print("'all' skips a page source when a feed of the same outlet is registered.")
+        print("External: NewsAPI (set NEWSAPI_KEY env var)")
+        return
+
+    if args.cmd == "bench":
+        ok = run_bench(args)
+        sys.exit(0 if ok else 1)
+
     conn = sqlite3.connect(DB_PATH)
     init_db(conn)
 
     if args.cmd == "fetch":
-        articles = []
-        # prefer NewsAPI if key present
-        if args.newsapi_key:
-            try:
-                articles = fetch_from_newsapi(args.newsapi_key, q=args.keyword, sources=(None if args.source=="all" else args.source), page_size=args.limit, max_pages=args.pages)
-            except Exception as e:
-                logging.error("NewsAPI fetch failed: %s", e)
-                articles = []
-        # If no articles or no key, fallback to scrapers depending on source
-        if not articles:
-            if args.source in ("all", "bbc"):
-                articles += scrape_bbc(limit=args.limit)
-            if args.source in ("all", "cnn"):
-                articles += scrape_cnn(limit=args.limit)
-            # potentially dedupe scraped list by URL/title before insert
-            seen = set()
-            unique = []
-            for a in articles:
-                key = (a.get("url") or "") + "|" + (a.get("title") or "")
-                if key in seen:
-                    continue
-                seen.add(key)
-                unique.append(a)
-            articles = unique
-
-        # store to DB
-        count = 0
-        for a in articles:
-            # ensure title exists
-            if not a.get("title"):
-                continue
-            insert_ok = insert_article(conn, a)
-            if insert_ok:
-                count += 1
-        logging.info("Stored %d new articles.", count)
+        session = make_session()
+        keys, newsapi_sources = select_sources(args.source)
+        groups = []
+        if args.newsapi_key and (args.source == "all" or newsapi_sources):
+            queries, limiter = newsapi_queries(args, newsapi_sources, session)
+            groups.append(("newsapi", plan_newsapi(conn, queries, limiter, full=args.full),
+                           functools.partial(finish_newsapi, conn, queries, limiter)))
+        cache = None if args.no_cache else HTTPCache()
+        for key in keys:
+            if is_feed(key):
+                feed = FeedPoller([key], limit=args.limit, session=session, cache=cache, full=args.full)
+                groups.append((key, feed.jobs(conn), functools.partial(feed.finish, conn)))
+            else:
+                commit = functools.partial(cache.commit, SOURCES[key]["url"]) if cache is not None else None
+                groups.append((key, source_jobs([key], limit=args.limit, session=session, cache=cache), commit))
+        # stored as they arrive (duplicates are filtered inside insert_articles)
+        seen = seen_filter(conn, args)
+        first_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+        writer = ArticleWriter(batch_size=args.write_batch, max_delay=args.write_delay,
+                               on_conflict=("update" if args.update_existing else "ignore"), seen=seen).start()
+        outcome = fetch_and_store(groups, writer, deadline=args.deadline, host_limit=args.host_concurrency)
+        writer.close()
+        stats = {k: sum(s[k] for s, _ in outcome.values()) for k in ("inserted", "updated", "skipped", "failed")}
+        if args.enrich and stats["inserted"]:
+            enrich_articles(conn, after_id=first_id, session=session, host_limit=args.enrich_concurrency)
+        session.close()
+        if cache is not None:
+            cache.save()
+        if seen is not None:
+            seen.save()
+        logging.info("Stored %d new articles (%d updated, %d skipped, %d failed).",
+                     stats["inserted"], stats["updated"], stats["skipped"], stats["failed"])
+        conn.close()
+        return
+
+    if args.cmd == "serve":
+        session = make_session()
+        cache = None if args.no_cache else HTTPCache()
+        on_conflict = "update" if args.update_existing else "ignore"
+        writer = ArticleWriter(batch_size=args.write_batch, max_delay=args.write_delay, on_conflict=on_conflict,
+                               seen=seen_filter(conn, args)).start()
+        enrich = None
+        if args.enrich:
+            enrich = functools.partial(enrich_articles, session=session, host_limit=args.enrich_concurrency)
+        sched = Scheduler(conn, jitter=args.jitter, deadline=args.deadline, host_limit=args.host_concurrency,
+                          on_conflict=on_conflict, cache=cache, writer=writer, enrich=enrich)
+        keys, newsapi_sources = select_sources(args.source)
+        if args.newsapi_key and (args.source == "all" or newsapi_sources):
+            queries, limiter = newsapi_queries(args, newsapi_sources, session)
+            sched.add("newsapi", functools.partial(plan_newsapi, conn, queries, limiter, args.full), args.newsapi_interval,
+                      after=functools.partial(finish_newsapi, conn, queries, limiter))
+        for key in keys:
+            interval = args.interval or SOURCES[key].get("interval", DEFAULT_INTERVAL)
+            if is_feed(key):
+                feed = FeedPoller([key], limit=args.limit, session=session, cache=cache, full=args.full)
+                sched.add(key, functools.partial(feed.jobs, conn), interval, after=functools.partial(feed.finish, conn))
+            else:
+                commit = functools.partial(cache.commit, SOURCES[key]["url"]) if cache is not None else None
+                sched.add(key, functools.partial(source_jobs, [key], limit=args.limit, session=session, cache=cache), interval,
+                          after=commit)
+        if not sched.tasks:
+            logging.error("Nothing to schedule.")
+            writer.close()
+            conn.close()
+            return
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        try:
+            sched.run_forever(stop)
+        except KeyboardInterrupt:
+            logging.info("Interrupted.")
+        session.close()
         conn.close()
         return
 
     if args.cmd == "view":
         start = parse_date(args.start) if args.start else None
-        end = parse_date(args.end) if args.end else None
-        rows = query_articles(conn, source=args.source, keyword=args.keyword, start_date=start, end_date=end, limit=args.limit)
+        end = parse_date(end_of_day(args.end)) if args.end else None
+        rows = query_articles(conn, source=args.source, keyword=args.keyword, start_date=start, end_date=end, limit=args.limit, collapse=args.collapse)
         if not rows:
             logging.info("No articles found.")
         else:
@@ -334,21 +3100,37 @@ def main():
 
     if args.cmd == "export":
         start = parse_date(args.start) if args.start else None
-        end = parse_date(args.end) if args.end else None
-        success = export_articles(conn, out_path=args.out, fmt=args.format, source=args.source, keyword=args.keyword, start_date=start, end_date=end)
+        end = parse_date(end_of_day(args.end)) if args.end else None
+        success = export_articles(conn, out_path=args.out, fmt=args.format, chunk_size=args.chunk_size, row_group_size=args.row_group_size, compression=args.compression, source=args.source, keyword=args.keyword, start_date=start, end_date=end, collapse=args.collapse)
         if success:
             logging.info("Export completed.")
         conn.close()
         return
 
+    if args.cmd == "generate":
+        n = generate_articles(conn, args.count, sources=args.sources, skew=args.skew, dup_rate=args.dup_rate,
+                              days=args.days, dist=args.dist, null_dates=args.null_dates, seed=args.seed)
+        logging.info("Generated %d synthetic articles in %s.", n, DB_PATH)
+        conn.close()
+        return
+
     if args.cmd == "dedupe":
-        dedupe_db(conn)
+        dedupe_db(conn, dry_run=args.dry_run, batch_size=args.batch_size)
         conn.close()
         return
 
-    if args.cmd == "list-sources":
-        print("Built-in scrapers: bbc, cnn")
-        print("External: NewsAPI (set NEWSAPI_KEY env var)")
+    if args.cmd == "cluster":
+        backfill_near_duplicates(conn, rebuild=args.rebuild)
+        conn.close()
+        return
+
+    if args.cmd == "enrich":
+        enrich_articles(conn, limit=args.limit, host_limit=args.host_concurrency)
+        conn.close()
+        return
+
+    if args.cmd == "reindex":
+        rebuild_fts(conn)
         conn.close()
         return
 
@@ -356,8 +3138,11 @@ def main():
         confirm = input("Are you sure you want to DELETE ALL articles? Type YES to confirm: ")
         if confirm == "YES":
             c = conn.cursor()
+            c.execute("DELETE FROM article_minhash;")
             c.execute("DELETE FROM articles;")
             conn.commit()
+            if os.path.exists(sidecar_path(SEEN_FILTER_SUFFIX)):
+                os.remove(sidecar_path(SEEN_FILTER_SUFFIX))
             logging.warning("All articles cleared.")
         else:
             logging.info("Aborted.")
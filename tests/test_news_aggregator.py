@@ -0,0 +1,439 @@
+import http.server
+import importlib.util
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+# the script's file name has a space, so it is loaded by path
+_spec = importlib.util.spec_from_file_location("news_aggregator", os.path.join(ROOT, "News aggregator.py"))
+news = importlib.util.module_from_spec(_spec)
+sys.modules["news_aggregator"] = news
+_spec.loader.exec_module(news)
+
+
+def legacy_db(path, rows):
+    """A database in the original schema (no dedup keys), duplicates allowed."""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE articles (
+            id INTEGER PRIMARY KEY, title TEXT, url TEXT, source TEXT,
+            published_at TEXT, summary TEXT, fetched_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX idx_url ON articles(url)")
+    conn.executemany("INSERT INTO articles (title, url, source) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+LEGACY_ROWS = [
+    ("Storm hits coast", "https://www.bbc.com/news/1", "BBC"),
+    ("Storm hits the coast", "http://bbc.com/news/1/?utm_source=rss#top", "BBC"),   # same URL
+    ("Markets rally", "https://edition.cnn.com/2024/markets", "CNN"),
+    ("Markets rally", "https://cnn.com/2024/markets-live", "CNN"),                   # same title
+    ("Election results", "https://www.bbc.com/news/2", "BBC"),
+]
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://www.BBC.com/news/1/?utm_source=rss&b=2&a=1#top", "https://bbc.com/news/1?a=1&b=2"),
+    ("https://edition.cnn.com:443/2024/story/index.html?fbclid=x", "https://cnn.com/2024/story/index.html"),
+    ("https://amp.bbc.co.uk/amp/news/123", "https://bbc.com/news/123"),
+    ("https://example.com/a/b.amp", "https://example.com/a/b"),
+    ("mailto:desk@example.com", "mailto:desk@example.com"),
+    ("", None),
+])
+def test_canonical_url(url, expected):
+    assert news.canonical_url(url) == expected
+
+
+def test_url_hash_ignores_variants_but_stored_url_keeps_them():
+    url = "http://edition.cnn.com/x?utm_source=a#top"
+    assert news.url_hash(url) == news.url_hash("https://cnn.com/x")
+    assert news.strip_fragment(url) == "http://edition.cnn.com/x?utm_source=a"
+
+
+def _feed_chunks(name, size=1000):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        raw = f.read()
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def test_parse_feed_fixture():
+    cfg = news.SOURCES["bbc-rss"]
+    items, guids = news.parse_feed(cfg, _feed_chunks("bbc-rss.xml"), limit=100)
+    assert len(items) == len(guids) == 60
+    first = items[0]
+    assert first["title"] == "BBC story 0: markets & weather"
+    assert first["url"] == "https://www.bbc.com/news/articles/bbc-rss-0"   # relative link joined to base_url
+    assert first["summary"] == "Summary of story 0, with markup and an entity &."
+    assert first["published_at"] == "2024-05-06T12:00:00+00:00"
+    assert items[1]["url"] == "https://www.bbc.com/news/articles/bbc-rss-1?at_medium=RSS"
+
+
+def test_parse_feed_skips_seen_and_leaves_overflow():
+    cfg = news.SOURCES["cnn-rss"]
+    items, guids = news.parse_feed(cfg, _feed_chunks("cnn-rss.xml"), seen={"cnn-rss-0", "cnn-rss-2"}, limit=3)
+    assert guids == ["cnn-rss-1", "cnn-rss-3", "cnn-rss-4"]
+    items, guids = news.parse_feed(cfg, _feed_chunks("cnn-rss.xml"), seen=set(guids) | {"cnn-rss-0", "cnn-rss-2"}, limit=3)
+    assert guids == ["cnn-rss-5", "cnn-rss-6", "cnn-rss-7"]
+
+
+def test_parse_feed_atom():
+    atom = b"""<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>t</title>
+    <entry><title>Atom one</title><link rel="self" href="https://x/self"/><link href="https://example.com/a1"/>
+    <id>urn:1</id><updated>2024-05-06T10:00:00Z</updated><summary type="html">&lt;b&gt;Sum&lt;/b&gt;</summary></entry></feed>"""
+    items, guids = news.parse_feed({"name": "X", "base_url": "https://example.com"}, [atom[:50], atom[50:]])
+    assert guids == ["urn:1"]
+    assert items == [{"title": "Atom one", "url": "https://example.com/a1", "source": "X",
+                      "published_at": "2024-05-06T10:00:00+00:00", "summary": "Sum"}]
+
+
+@pytest.fixture
+def feed_server():
+    """Serve the bbc-rss fixture with an ETag, answering 304 to a matching If-None-Match."""
+    with open(os.path.join(FIXTURES, "bbc-rss.xml"), "rb") as f:
+        body = f.read()
+    hits = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/rss.xml", hits
+    server.shutdown()
+
+
+def test_feed_poller_reads_past_limit_and_migrates_state(tmp_path, monkeypatch, feed_server):
+    url, hits = feed_server
+    monkeypatch.setitem(news.SOURCES, "t-rss", {**news.SOURCES["bbc-rss"], "url": url, "min_interval": 0})
+    conn = sqlite3.connect(str(tmp_path / "news.db"))
+    news.init_db(conn)
+    cache = news.HTTPCache(str(tmp_path / "news.httpcache.json"))
+    poller = news.FeedPoller(["t-rss"], limit=25, cache=cache)
+    counts = []
+    for _ in range(4):
+        items = news.fetch_jobs(poller.jobs(conn), deadline=10)[0]
+        news.insert_articles(conn, items)
+        poller.finish(conn)
+        counts.append(len(items))
+    # truncated polls skip the validators; the third one reads the feed to its end
+    assert counts == [25, 25, 10, 0]
+    assert hits == [None, None, None, '"v1"']
+
+    # older databases kept only last_guid
+    old = sqlite3.connect(str(tmp_path / "old.db"))
+    old.execute("CREATE TABLE feed_state (feed_key TEXT PRIMARY KEY, last_guid TEXT, updated_at TEXT)")
+    old.execute("INSERT INTO feed_state VALUES ('t-rss', 'bbc-rss-0', NULL)")
+    old.commit()
+    news.init_db(old)
+    assert old.execute("SELECT seen_guids FROM feed_state").fetchone()[0] == '["bbc-rss-0"]'
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(feed_state)")]
+    assert cols == ["feed_key", "seen_guids", "updated_at"]
+
+
+def test_seen_filter_round_trip(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "news.db"))
+    news.init_db(conn)
+    news.insert_articles(conn, [{"title": f"Story {i}", "url": f"https://example.com/{i}"} for i in range(100)])
+    path = str(tmp_path / "news.seen.bloom")
+    flt = news.SeenFilter.load(conn, path)
+    flt.save(path)
+
+    loaded = news.SeenFilter.load(conn, path)
+    assert (loaded.bits, loaded.hashes, loaded.keys, loaded.array) == (flt.bits, flt.hashes, flt.keys, flt.array)
+    assert loaded.maybe_seen(news.url_hash("http://www.example.com/5/"), None)
+    assert loaded.maybe_seen(None, news.title_hash("Story 7"))
+    assert not loaded.maybe_seen(news.url_hash("https://example.com/new"), news.title_hash("Brand new"))
+
+    # rows stored after the save are picked up on load
+    news.insert_articles(conn, [{"title": "Late story", "url": "https://example.com/late"}])
+    assert news.SeenFilter.load(conn, path).maybe_seen(news.url_hash("https://example.com/late"), None)
+
+
+def test_migrate_dedup_keys_keeps_duplicates_unkeyed(tmp_path):
+    conn = legacy_db(str(tmp_path / "old.db"), LEGACY_ROWS)
+    news.init_db(conn)
+    rows = conn.execute("SELECT id, url_hash, title_hash FROM articles ORDER BY id").fetchall()
+    assert len(rows) == 5
+    assert rows[0][1] == news.url_hash(LEGACY_ROWS[0][1]) and rows[1][1] is None
+    assert rows[2][2] == news.title_hash("Markets rally") and rows[3][2] is None
+    indexes = {r[1] for r in conn.execute("PRAGMA index_list(articles)")}
+    assert {"ux_articles_url_hash", "ux_articles_title_hash"} <= indexes
+    assert "idx_url" not in indexes
+    # the UNIQUE indexes now reject a third copy
+    stats = news.insert_articles(conn, [{"title": "Another title", "url": "https://bbc.com/news/1"}])
+    assert stats[0]["inserted"] == 0
+
+
+def test_dedupe_db(tmp_path):
+    conn = legacy_db(str(tmp_path / "old.db"), LEGACY_ROWS)
+    news.init_db(conn)
+    assert news.dedupe_db(conn, dry_run=True) == {"url": 1, "title": 1}
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 5
+    assert news.dedupe_db(conn) == {"url": 1, "title": 1}
+    titles = [r[0] for r in conn.execute("SELECT title FROM articles ORDER BY id")]
+    assert titles == ["Storm hits coast", "Markets rally", "Election results"]
+    assert news.dedupe_db(conn) == {"url": 0, "title": 0}
+
+
+def test_fetch_jobs_deadline_bounds_the_process():
+    script = f"""
+import importlib.util, sys, time
+spec = importlib.util.spec_from_file_location("news_aggregator", {os.path.join(ROOT, "News aggregator.py")!r})
+news = importlib.util.module_from_spec(spec)
+sys.modules["news_aggregator"] = news
+spec.loader.exec_module(news)
+news.PARSE_WORKERS = 0
+jobs = [("slow", "a", lambda: time.sleep(30) or []), ("fast", "b", lambda: [{{"title": "t"}}])]
+print(news.fetch_jobs(jobs, deadline=0.5))
+"""
+    started = time.monotonic()
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=20)
+    assert out.stdout.strip() == "[None, [{'title': 't'}]]"
+    assert time.monotonic() - started < 10
+
+
+NEAR_DUPLICATES = [
+    ("Liverpool beat Arsenal in thriller", "Liverpool beat Arsenal in a thriller"),
+    ("Biden and Xi meet in San Francisco to ease tensions", "Biden, Xi meet in San Francisco to ease tensions"),
+    ("Earthquake of magnitude 7.1 strikes off coast of Japan", "Magnitude 7.1 earthquake strikes off coast of Japan"),
+    ("Storm Ciaran: Thousands without power as winds hit 100mph",
+     "Storm Ciaran leaves thousands without power as 100mph winds hit"),
+]
+UNRELATED = [
+    "Arsenal beat Liverpool in thriller",
+    "UK inflation falls to 4.6% in October",
+    "UK inflation falls to 6.7% in September",
+    "Liverpool beat Chelsea 3-0",
+]
+
+
+def test_near_duplicate_headlines_share_a_cluster(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "news.db"))
+    news.init_db(conn)
+    titles = [t for pair in NEAR_DUPLICATES for t in pair] + UNRELATED
+    # each outlet writes its own summary; only the headline is compared
+    news.insert_articles(conn, [
+        {"title": t, "url": f"https://outlet{i}.example.com/{i}", "summary": f"Outlet {i} copy"} for i, t in enumerate(titles)
+    ])
+    cluster = dict(conn.execute(
+        "SELECT a.title, s.cluster_id FROM articles a JOIN article_minhash s ON s.article_id = a.id"
+    ))
+    for first, second in NEAR_DUPLICATES:
+        assert cluster[first] == cluster[second]
+    assert len({cluster[t] for t in UNRELATED} | {cluster[p[0]] for p in NEAR_DUPLICATES}) == len(UNRELATED) + len(NEAR_DUPLICATES)
+    assert len(news.query_articles(conn, collapse=True)) == len(UNRELATED) + len(NEAR_DUPLICATES)
+
+    # deleting a representative hands its cluster to the next member
+    conn.execute("DELETE FROM articles WHERE title = ?", (NEAR_DUPLICATES[0][0],))
+    assert len(news.query_articles(conn, collapse=True)) == len(UNRELATED) + len(NEAR_DUPLICATES)
+
+
+def test_migrate_timestamps_and_date_filters(tmp_path):
+    conn = legacy_db(str(tmp_path / "old.db"), [])
+    conn.executemany("INSERT INTO articles (title, url, source, published_at, fetched_at) VALUES (?, ?, ?, ?, ?)", [
+        ("Zulu offset", "https://a/1", "A", "2024-01-20T23:30:00-02:00", "2024-01-22T00:00:00"),   # 21 Jan 01:30 UTC
+        ("Naive is UTC", "https://a/2", "A", "2024-01-20T10:00:00", "2024-01-22T00:00:00"),
+        ("RFC 822", "https://a/3", "B", "Wed, 31 Jan 2024 18:00:00 GMT", "2024-02-01T00:00:00"),
+        ("Undated", "https://a/4", "B", None, "2024-02-01T00:00:00"),
+    ])
+    conn.commit()
+    news.init_db(conn)
+    stamps = dict(conn.execute("SELECT title, published_ts FROM articles"))
+    assert stamps == {"Zulu offset": 1705800600, "Naive is UTC": 1705744800, "RFC 822": 1706724000, "Undated": None}
+    assert conn.execute("SELECT COUNT(*) FROM articles WHERE fetched_ts IS NULL").fetchone()[0] == 0
+
+    def titles(**filters):
+        return [a["title"] for a in news.query_articles(conn, **filters)]
+
+    # newest first, undated rows last
+    assert titles() == ["RFC 822", "Zulu offset", "Naive is UTC", "Undated"]
+    # bounds compare instants, not strings: 23:30 at -02:00 falls on the 21st in UTC
+    assert titles(start_date="2024-01-21", end_date=news.end_of_day("2024-01-21")) == ["Zulu offset"]
+    assert titles(end_date=news.end_of_day("2024-01-20")) == ["Naive is UTC"]
+    assert titles(start_date="2024-01-31", end_date=news.end_of_day("2024-01-31")) == ["RFC 822"]
+    assert titles(source="b", start_date="2024-01-01") == ["RFC 822"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time: sleep() advances time() instead of blocking; the sleeps are recorded."""
+    state = {"now": 1_700_000_000.0, "sleeps": []}
+
+    def sleep(seconds):
+        state["sleeps"].append(round(seconds, 3))
+        state["now"] += seconds
+
+    monkeypatch.setattr(news.time, "time", lambda: state["now"])
+    monkeypatch.setattr(news.time, "sleep", sleep)
+    monkeypatch.setattr(news.random, "random", lambda: 0.0)
+    return state
+
+
+def test_rate_limiter_bucket_quota_and_persistence(tmp_path, clock):
+    limiter = news.RateLimiter(rate=2.0, burst=2, daily_quota=4)
+    for _ in range(4):
+        limiter.acquire()
+    # two from the burst, then one token every 0.5s
+    assert clock["sleeps"] == [0.5, 0.5]
+    with pytest.raises(news.QuotaExhausted):
+        limiter.acquire()
+
+    conn = sqlite3.connect(str(tmp_path / "news.db"))
+    restored = news.RateLimiter(rate=2.0, burst=2, daily_quota=4)
+    restored.load(conn)         # creates api_quota, as plan_newsapi does before any save
+    limiter.block(30)
+    limiter.save(conn)
+    restored.load(conn)
+    assert restored.remaining() == 0
+    restored.day = "2000-01-01"     # a new UTC day resets the quota, not the Retry-After block
+    assert restored.remaining() == 4
+    restored.acquire()
+    assert clock["sleeps"][-1] == 30
+    with pytest.raises(news.NewsAPIError):
+        restored.block(120)
+        restored.acquire(max_wait=60)
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None, text=""):
+        self.status_code = status
+        self.headers = headers or {}
+        self.text = text
+
+
+class FakeHTTP:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def test_request_with_retry_honors_retry_after(clock):
+    limiter = news.RateLimiter(rate=100.0, burst=10, daily_quota=100)
+    http = FakeHTTP(FakeResponse(429, {"Retry-After": "7"}), FakeResponse(503), FakeResponse(200))
+    assert news.request_with_retry(http, "https://api", limiter=limiter).status_code == 200
+    # the 429 blocks the shared limiter for 7s; the 503 backs off 2s
+    assert clock["sleeps"] == [7.0, 2.0]
+    assert limiter.remaining() == 97
+
+    http = FakeHTTP(FakeResponse(401, text="bad key"))
+    with pytest.raises(news.NewsAPIError, match="401"):
+        news.request_with_retry(http, "https://api")
+    assert http.calls == 1
+
+    # a wait longer than MAX_RETRY_WAIT fails the cycle instead of sleeping through it
+    http = FakeHTTP(FakeResponse(429, {"Retry-After": "3600"}))
+    with pytest.raises(news.NewsAPIError, match="giving up"):
+        news.request_with_retry(http, "https://api")
+
+    http = FakeHTTP(*[FakeResponse(500)] * 3)
+    with pytest.raises(news.NewsAPIError, match="after 3 attempts"):
+        news.request_with_retry(http, "https://api", retries=2)
+
+
+def test_writer_failures_hold_back_cursors(tmp_path, monkeypatch):
+    db = str(tmp_path / "news.db")
+    conn = sqlite3.connect(db)
+    news.init_db(conn)
+    monkeypatch.setattr(news, "PARSE_WORKERS", 0)
+    writer = news.ArticleWriter(db_path=db, batch_size=5, max_delay=0.05).start()
+
+    def good():
+        return [{"title": f"Story {i}", "url": f"https://a.example.com/{i}"} for i in range(7)]
+
+    def unstorable():
+        return [{"title": object(), "url": "https://b.example.com/1"}]   # sqlite cannot bind it
+
+    def broken():
+        raise ValueError("parse error")
+
+    query = news.NewsAPIQuery("key", endpoint="everything")
+    query.newest = 1_700_000_000
+    limiter = news.RateLimiter()
+    limiter.load(conn)
+    finished = {}
+    groups = [
+        ("good", [("A", "a", good)], lambda ok: finished.setdefault("good", ok)),
+        ("unstorable", [("B", "b", unstorable)],
+         lambda ok: (finished.setdefault("unstorable", ok), news.finish_newsapi(conn, [query], limiter, ok=ok))),
+        ("broken", [("C", "c", broken)], lambda ok: finished.setdefault("broken", ok)),
+    ]
+    outcome = news.fetch_and_store(groups, writer, deadline=10)
+    assert finished == {"good": True, "unstorable": False, "broken": False}
+    assert outcome["good"] == ({"inserted": 7, "updated": 0, "skipped": 0, "failed": 0}, True)
+    assert outcome["unstorable"][0]["failed"] == 1
+    assert news.load_cursor(conn, query.key) is None      # not advanced past unstored rows
+
+    # the writer thread survives the failure and keeps storing
+    writer.put([{"title": "Later", "url": "https://a.example.com/later"}], tag="good")
+    writer.flush()
+    assert writer.close() == {"inserted": 1, "updated": 0, "skipped": 0, "failed": 0}
+    news.finish_newsapi(conn, [query], limiter, ok=True)
+    assert news.load_cursor(conn, query.key) == 1_700_000_000
+
+
+def test_writer_counts_everything_failed_when_db_cannot_open(tmp_path):
+    writer = news.ArticleWriter(db_path=str(tmp_path / "missing" / "news.db"), max_delay=0.05).start()
+    writer.put([{"title": "A", "url": "https://a/1"}, {"title": "B", "url": "https://a/2"}], tag="t")
+    writer.flush()
+    assert writer.take_stats("t") == {"inserted": 0, "updated": 0, "skipped": 0, "failed": 2}
+    writer.close()
+
+
+def test_keyword_search_fts_and_fallbacks(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "news.db"))
+    news.init_db(conn)
+    news.insert_articles(conn, [
+        {"title": "Election results", "url": "https://www.bbc.com/news/1", "summary": "Counting continues"},
+        {"title": "Markets rally", "url": "https://cnn.com/markets", "summary": "An election lifts stocks"},
+        {"title": "Weather warning", "url": "https://cnn.com/weather", "summary": "Storms expected"},
+    ])
+    assert news.fts_available(conn)
+
+    def titles(keyword):
+        return [a["title"] for a in news.query_articles(conn, keyword=keyword)]
+
+    # bm25 with the title weighted above the summary
+    assert titles("election") == ["Election results", "Markets rally"]
+    assert titles("elect*") == ["Election results", "Markets rally"]
+    assert titles("election NOT stocks") == ["Election results"]
+    # not valid FTS5 syntax: retried as a quoted phrase instead of failing
+    assert titles("bbc.com") == ["Election results"]
+    assert titles('"unbalanced') == []
+    assert titles("weather:") == ["Weather warning"]
+
+    # databases without the FTS table fall back to LIKE
+    for name in ("articles_fts_ai", "articles_fts_ad", "articles_fts_au"):
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DROP TABLE articles_fts")
+    assert not news.fts_available(conn)
+    assert titles("bbc.com") == ["Election results"]
+    assert sorted(titles("ELECTION")) == ["Election results", "Markets rally"]